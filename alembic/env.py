@@ -2,19 +2,12 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config, pool
 
-import app.models.user_badge
-import app.models.badge
-import app.models.craving
-import app.models.diary
-import app.models.goal
-import app.models.motivation
-import app.models.preference
-import app.models.user
+import app.models  # registers every model on Base.metadata
 from alembic import context
 from app.core.config import settings
 
 # your imports for metadata
-from app.db.base import Base  # declarative Base
+from app.db_config.base import Base  # declarative Base
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
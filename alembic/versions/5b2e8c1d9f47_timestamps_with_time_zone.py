@@ -0,0 +1,51 @@
+"""timestamps with time zone
+
+Revision ID: 5b2e8c1d9f47
+Revises: 43a6f551cd26
+Create Date: 2025-08-20 10:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2e8c1d9f47'
+down_revision: Union[str, None] = '43a6f551cd26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'badges',
+    'cravings',
+    'daily_motivations',
+    'diaries',
+    'goals',
+    'preferences',
+)
+COLUMNS = ('created_at', 'updated_at')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing values were written with datetime.utcnow(), so read them as UTC
+    for table in TABLES:
+        for column in COLUMNS:
+            op.alter_column(table, column,
+                       existing_type=sa.DateTime(),
+                       type_=sa.DateTime(timezone=True),
+                       existing_nullable=False,
+                       postgresql_using=f"{column} AT TIME ZONE 'UTC'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for column in COLUMNS:
+            op.alter_column(table, column,
+                       existing_type=sa.DateTime(timezone=True),
+                       type_=sa.DateTime(),
+                       existing_nullable=False,
+                       postgresql_using=f"{column} AT TIME ZONE 'UTC'")
@@ -0,0 +1,48 @@
+"""timestamp server defaults
+
+Revision ID: 8d41f0a6c2e3
+Revises: 5b2e8c1d9f47
+Create Date: 2025-08-21 09:03:17.551904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41f0a6c2e3'
+down_revision: Union[str, None] = '5b2e8c1d9f47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'badges',
+    'cravings',
+    'daily_motivations',
+    'diaries',
+    'goals',
+    'preferences',
+)
+COLUMNS = ('created_at', 'updated_at')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        for column in COLUMNS:
+            op.alter_column(table, column,
+                       existing_type=sa.DateTime(timezone=True),
+                       existing_nullable=False,
+                       server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in TABLES:
+        for column in COLUMNS:
+            op.alter_column(table, column,
+                       existing_type=sa.DateTime(timezone=True),
+                       existing_nullable=False,
+                       server_default=None)
@@ -0,0 +1,61 @@
+"""motivation jsonb payload
+
+Revision ID: a6d1f3b8c4e2
+Revises: f4c8b2e6a930
+Create Date: 2025-08-26 15:08:33.942517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a6d1f3b8c4e2'
+down_revision: Union[str, None] = 'f4c8b2e6a930'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TEXT_COLUMNS = ('progress', 'motivation', 'cravings', 'ideas')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('daily_motivations', sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.execute(
+        """
+        UPDATE daily_motivations
+        SET payload = jsonb_build_object(
+            'progress', progress,
+            'motivation', motivation,
+            'cravings', cravings,
+            'ideas', ideas,
+            'recommendations', recommendations
+        )
+        """
+    )
+    op.alter_column('daily_motivations', 'payload', nullable=False)
+    for column in TEXT_COLUMNS:
+        op.drop_column('daily_motivations', column)
+    op.drop_column('daily_motivations', 'recommendations')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in TEXT_COLUMNS:
+        op.add_column('daily_motivations', sa.Column(column, sa.Text(), nullable=True))
+    op.add_column('daily_motivations', sa.Column('recommendations', sa.Text(), nullable=True))
+    op.execute(
+        """
+        UPDATE daily_motivations
+        SET progress = payload->>'progress',
+            motivation = payload->>'motivation',
+            cravings = payload->>'cravings',
+            ideas = payload->>'ideas',
+            recommendations = payload->>'recommendations'
+        """
+    )
+    for column in TEXT_COLUMNS:
+        op.alter_column('daily_motivations', column, nullable=False)
+    op.drop_column('daily_motivations', 'payload')
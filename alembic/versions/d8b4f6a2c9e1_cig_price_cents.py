@@ -0,0 +1,44 @@
+"""cig price cents
+
+Revision ID: d8b4f6a2c9e1
+Revises: c5e7a2d9f168
+Create Date: 2025-08-28 13:35:21.806457
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b4f6a2c9e1'
+down_revision: Union[str, None] = 'c5e7a2d9f168'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.alter_column('preferences', 'cig_price', new_column_name='cig_price_cents')
+    op.execute("UPDATE preferences SET cig_price_cents = COALESCE(cig_price_cents, 0) * 100")
+    op.alter_column('preferences', 'cig_price_cents',
+               existing_type=sa.INTEGER(),
+               nullable=False,
+               server_default='0',
+               comment='Price per cigarette in cents of the local currency',
+               existing_comment='Price per cigarette in local currency')
+    op.create_check_constraint('ck_preferences_cig_price_cents', 'preferences', 'cig_price_cents >= 0')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('ck_preferences_cig_price_cents', 'preferences', type_='check')
+    op.alter_column('preferences', 'cig_price_cents',
+               existing_type=sa.INTEGER(),
+               nullable=True,
+               server_default=None,
+               comment='Price per cigarette in local currency',
+               existing_comment='Price per cigarette in cents of the local currency')
+    op.execute("UPDATE preferences SET cig_price_cents = cig_price_cents / 100")
+    op.alter_column('preferences', 'cig_price_cents', new_column_name='cig_price')
@@ -0,0 +1,50 @@
+"""bounded string columns
+
+Revision ID: f4c8b2e6a930
+Revises: e2a9d4c7b815
+Create Date: 2025-08-25 11:17:52.604871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c8b2e6a930'
+down_revision: Union[str, None] = 'e2a9d4c7b815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, column, length, nullable)
+COLUMNS = (
+    ('badges', 'name', 128, False),
+    ('badges', 'description', 2048, True),
+    ('preferences', 'reason', 2048, False),
+    ('preferences', 'language', 128, True),
+    ('cravings', 'feeling', 64, True),
+    ('cravings', 'activity', 64, True),
+    ('cravings', 'company', 64, True),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table, column, length, nullable in COLUMNS:
+        # These held unbounded user input: cut longer values down to the new
+        # limit instead of failing the migration part-way through a deploy
+        op.alter_column(table, column,
+                   existing_type=sa.Text(),
+                   type_=sa.String(length=length),
+                   existing_nullable=nullable,
+                   postgresql_using=f'left({column}, {length})')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, length, nullable in COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=sa.String(length=length),
+                   type_=sa.Text(),
+                   existing_nullable=nullable)
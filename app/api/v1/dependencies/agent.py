@@ -0,0 +1,8 @@
+from typing import Optional
+
+from fastapi import Request
+
+
+def get_agent(request: Request) -> Optional[object]:
+    """Dependency returning the process-wide chat agent, or None if it failed to start."""
+    return request.app.state.agent
@@ -1,9 +1,14 @@
+from typing import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db_config.db_async_session import async_session
 
 
-async def get_async_db() -> AsyncSession:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Yield one AsyncSession per request; the context manager closes it (and
+    returns its connection to the pool) as soon as the response is sent.
+    """
     async with async_session() as session:
         yield session
@@ -1,15 +1,22 @@
-from typing import Dict, List, Optional
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Sequence
 
 import httpx
 import requests
-from fastapi import Depends, HTTPException, Security, status
+from cachetools import TLRUCache
+from fastapi import Depends, HTTPException, Request, Security, status
 from fastapi.security import OAuth2AuthorizationCodeBearer
 from jose import jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.interfaces import LoaderOption
 
 from app.api.v1.dependencies.async_db_session import get_async_db
 from app.core.config import settings
+from app.models.preference import Preference
 from app.models.user import User
 
 # Auth0 configuration
@@ -26,8 +33,36 @@ oauth2_scheme = OAuth2AuthorizationCodeBearer(
     scopes={},
 )
 
+
+
+def create_auth0_http() -> httpx.AsyncClient:
+    """Keep-alive client for Auth0; created and closed by the app lifespan."""
+    return httpx.AsyncClient(
+        base_url=f"https://{auth0_domain}",
+        timeout=5.0,
+        limits=httpx.Limits(max_keepalive_connections=32),
+    )
+
+
+def get_auth0_http(request: Request) -> httpx.AsyncClient:
+    """Dependency returning the process-wide Auth0 client."""
+    return request.app.state.auth0_http
+
+
 _jwks_cache: Optional[Dict] = None
 
+# Verified claims keyed by a digest of the raw token. Entries live at most
+# 60 s and never past the token's own `exp`; only successful verifications
+# are stored. The lock is needed because get_token_payload runs in the
+# threadpool.
+_CLAIMS_CACHE_TTL = 60
+_claims_cache: TLRUCache = TLRUCache(
+    maxsize=4096,
+    ttu=lambda _key, claims, now: min(now + _CLAIMS_CACHE_TTL, claims["exp"]),
+    timer=time.time,
+)
+_claims_cache_lock = threading.Lock()
+
 
 def get_jwks() -> Dict:
     global _jwks_cache
@@ -41,6 +76,20 @@ def get_jwks() -> Dict:
 
 
 def verify_jwt(token: str) -> Dict:
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _claims_cache_lock:
+        cached = _claims_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    payload = _decode_jwt(token)
+    if "exp" in payload:
+        with _claims_cache_lock:
+            _claims_cache[cache_key] = payload
+    return payload
+
+
+def _decode_jwt(token: str) -> Dict:
     jwks = get_jwks()
     try:
         header = jwt.get_unverified_header(token)
@@ -95,17 +144,21 @@ def get_token_payload(token: str = Security(oauth2_scheme)) -> Dict:
     return verify_jwt(token)
 
 
-async def get_current_user(
-    db: AsyncSession = Depends(get_async_db),
-    token_data: Dict = Depends(get_token_payload),
-    raw_token: str = Security(oauth2_scheme),
+async def _get_or_create_user(
+    db: AsyncSession,
+    http: httpx.AsyncClient,
+    token_data: Dict,
+    raw_token: str,
+    options: Sequence[LoaderOption] = (),
 ) -> User:
     auth0_sub = token_data.get("sub")
     if not auth0_sub:
         raise HTTPException(status_code=401, detail="Token missing 'sub' claim.")
 
     # Try to find existing user by auth0_id
-    result = await db.execute(select(User).where(User.auth0_id == auth0_sub))
+    result = await db.execute(
+        select(User).options(*options).where(User.auth0_id == auth0_sub)
+    )
     user = result.scalar_one_or_none()
 
     if user is None:
@@ -123,11 +176,10 @@ async def get_current_user(
         # If missing essentials, try /userinfo
         if not (email and full_name):
             try:
-                async with httpx.AsyncClient(timeout=5.0) as client:
-                    r = await client.get(
-                        f"https://{auth0_domain}/userinfo",
-                        headers={"Authorization": f"Bearer {raw_token}"},
-                    )
+                r = await http.get(
+                    "/userinfo",
+                    headers={"Authorization": f"Bearer {raw_token}"},
+                )
                 if r.status_code == 200:
                     info = r.json()
                     email = email or info.get("email")
@@ -153,13 +205,41 @@ async def get_current_user(
         db.add(user)
         await db.commit()
         await db.refresh(user)
+        if options:
+            # A brand-new user has no preference yet; load the empty relation
+            await db.refresh(user, attribute_names=["preference"])
 
     return user
 
 
-def get_m2m_token() -> str:
-    resp = httpx.post(
-        f"https://{auth0_domain}/oauth/token",
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
+    token_data: Dict = Depends(get_token_payload),
+    raw_token: str = Security(oauth2_scheme),
+    http: httpx.AsyncClient = Depends(get_auth0_http),
+) -> User:
+    return await _get_or_create_user(db, http, token_data, raw_token)
+
+
+async def get_current_user_with_preference(
+    db: AsyncSession = Depends(get_async_db),
+    token_data: Dict = Depends(get_token_payload),
+    raw_token: str = Security(oauth2_scheme),
+    http: httpx.AsyncClient = Depends(get_auth0_http),
+) -> User:
+    """Like get_current_user, with `preference` and its goals eager-loaded."""
+    return await _get_or_create_user(
+        db,
+        http,
+        token_data,
+        raw_token,
+        options=(selectinload(User.preference).selectinload(Preference.goals),),
+    )
+
+
+async def get_m2m_token(http: httpx.AsyncClient) -> str:
+    resp = await http.post(
+        "/oauth/token",
         json={
             "grant_type": "client_credentials",
             "client_id": client_id,
@@ -172,26 +252,35 @@ def get_m2m_token() -> str:
     return resp.json()["access_token"]
 
 
-def update_user_email(auth0_id: str, new_email: str):
-    token = get_m2m_token()
-    url = f"https://{auth0_domain}/api/v2/users/{auth0_id}"
+async def update_user_email(
+    http: httpx.AsyncClient,
+    auth0_id: str,
+    new_email: str,
+    token: Optional[str] = None,
+):
+    # Callers may pass a Management API token they already fetched
+    token = token or await get_m2m_token(http)
+    url = f"/api/v2/users/{auth0_id}"
     headers = {"Authorization": f"Bearer {token}"}
     payload = {
         "email": new_email,
         "email_verified": False,  # force re-verify
         "verify_email": True,  # trigger the confirmation email
     }
-    r = httpx.patch(url, json=payload, headers=headers, timeout=10.0)
+    r = await http.patch(url, json=payload, headers=headers, timeout=10.0)
     r.raise_for_status()
     return r.json()
 
 
-def can_update_email(auth0_id: str) -> bool:
-    token = get_m2m_token()
+async def can_update_email(
+    http: httpx.AsyncClient, auth0_id: str, token: Optional[str] = None
+) -> bool:
+    # Callers may pass a Management API token they already fetched
+    token = token or await get_m2m_token(http)
     headers = {"Authorization": f"Bearer {token}"}
     # Only fetch the identities field
-    url = f"https://{auth0_domain}/api/v2/users/{auth0_id}?fields=identities"
-    r = httpx.get(url, headers=headers, timeout=5.0)
+    url = f"/api/v2/users/{auth0_id}?fields=identities"
+    r = await http.get(url, headers=headers, timeout=5.0)
     r.raise_for_status()
     identities = r.json().get("identities", [])
     # “auth0” provider == native database user
@@ -6,6 +6,7 @@ from sqlalchemy.orm import selectinload
 
 from app.api.v1.dependencies.auth0 import get_current_user, require_permission
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.core.routing import ORJSONRoute
 from app.models.badge import Badge
 from app.models.user import User
 from app.schemas.badges import (
@@ -17,7 +18,7 @@ from app.schemas.badges import (
     UserBadgeResponse,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 
 @router.post(
@@ -30,18 +31,17 @@ async def create_badge(
     badge_in: BadgesIn,
     db: AsyncSession = Depends(get_async_db),
 ):
-    badge = Badge(**badge_in.dict())
+    badge = Badge(**badge_in.model_dump())
     db.add(badge)  
     try:
         await db.commit()
     except IntegrityError as e:
         await db.rollback()
-        if "uq_badges_condition_time" in str(e.orig):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="A badge with that condition_time already exists.",
-            ) from e
-        raise
+        # name is the only unique column on badges
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="A badge with that name already exists.",
+        ) from e
     await db.refresh(badge)
     return badge
 
@@ -115,7 +115,7 @@ async def update_badge(
             status_code=status.HTTP_404_NOT_FOUND, detail="Badge not found"
         )
 
-    for field, value in badge_in.dict(exclude_unset=True).items():
+    for field, value in badge_in.model_dump(exclude_unset=True).items():
         setattr(badge, field, value)
 
     try:
@@ -125,11 +125,6 @@ async def update_badge(
         err_msg = str(e.orig).lower()
         if "badges_name_key" in err_msg or "uq_badges_name" in err_msg:
             detail = "A badge with that name already exists."
-        elif (
-            "badges_condition_time_key" in err_msg
-            or "uq_badges_condition_time" in err_msg
-        ):
-            detail = "A badge with that condition_time already exists."
         else:
             detail = "Badge update failed due to a unique constraint violation."
         raise HTTPException(
@@ -1,79 +1,86 @@
+import asyncio
 import logging
-from typing import Generator
+import re
+from typing import AsyncGenerator, Sequence
 from uuid import uuid4
-from datetime import date
+from datetime import date, timedelta
 
 from fastapi import APIRouter, Body, Depends, HTTPException, Path, status
 from fastapi import Security
-from sqlalchemy import select
+from sqlalchemy import lambda_stmt, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
-from app.api.v1.dependencies.auth0 import get_current_user
+from app.api.v1.dependencies.agent import get_agent
+from app.api.v1.dependencies.auth0 import get_current_user, get_current_user_with_preference
 from app.api.v1.dependencies.auth0 import oauth2_scheme
 from app.api.v1.dependencies.async_db_session import get_async_db
-from app.models.preference import Preference
+from app.core.routing import ORJSONRoute
+from app.db_config.db_async_session import async_session
+from app.models.craving import Craving
+from app.models.diary import Diary
 from app.models.user import User
+from app.prompts.chat import STRICT_REFUSAL_MSG
 from app.schemas.chat import ChatIn, ThreadOut
-from app.services.ai.agent import agent
 from app.services.ai.tools import user_context_tool
 from app.utils.ai import _event, _extract_text, _iter_tool_calls, _to_json, sse
 
 logger = logging.getLogger(__name__)
 
 # Pre-processing filter for non-smoking questions
-def _is_non_smoking_question(question: str) -> bool:
-    """Check if the question is clearly unrelated to smoking cessation."""
-    question_lower = question.lower().strip()
-    
-    # Smoking-related keywords that should be allowed
-    smoking_keywords = [
-        "smoke", "smoking", "cigarette", "cigarettes", "tobacco", "nicotine", 
-        "quit", "quitting", "cessation", "craving", "cravings", "withdrawal",
-        "relapse", "relapsed", "diary", "progress", "goal", "goals",
-        "health", "lung", "cancer", "heart", "breathing", "addiction",
-        "vape", "vaping", "e-cigarette", "hookah", "pipe", "cigar",
-        "secondhand", "passive", "smoke-free", "smokefree", "nonsmoker"
-    ]
+# Smoking-related keywords that should be allowed
+_SMOKING_KEYWORDS = [
+    "smoke", "smoking", "cigarette", "cigarettes", "tobacco", "nicotine", 
+    "quit", "quitting", "cessation", "craving", "cravings", "withdrawal",
+    "relapse", "relapsed", "diary", "progress", "goal", "goals",
+    "health", "lung", "cancer", "heart", "breathing", "addiction",
+    "vape", "vaping", "e-cigarette", "hookah", "pipe", "cigar",
+    "secondhand", "passive", "smoke-free", "smokefree", "nonsmoker"
+]
+
+# Non-smoking question patterns that should be refused
+_NON_SMOKING_PATTERNS = [
+    # Geography and general knowledge
+    "capital of", "what country", "where is", "population of",
+    "who invented", "when was", "how to cook", "what is the weather",
+    "what is", "who is", "when did", "how many", "how much",
     
-    # Check if question contains any smoking-related keywords
-    has_smoking_keyword = any(keyword in question_lower for keyword in smoking_keywords)
+    # Technology and programming
+    "how to code", "programming", "python", "javascript", "html",
+    "computer", "software", "app", "website", "database",
     
-    # If it has smoking keywords, it's likely related to smoking cessation
-    if has_smoking_keyword:
-        return False
+    # Entertainment and media
+    "movie", "film", "actor", "actress", "song", "music", "book",
+    "game", "sport", "team", "player",
     
-    # Non-smoking question patterns that should be refused
-    non_smoking_patterns = [
-        # Geography and general knowledge
-        "capital of", "what country", "where is", "population of",
-        "who invented", "when was", "how to cook", "what is the weather",
-        "what is", "who is", "when did", "how many", "how much",
-        
-        # Technology and programming
-        "how to code", "programming", "python", "javascript", "html",
-        "computer", "software", "app", "website", "database",
-        
-        # Entertainment and media
-        "movie", "film", "actor", "actress", "song", "music", "book",
-        "game", "sport", "team", "player",
-        
-        # Science and education (non-health related)
-        "physics", "chemistry", "biology", "math", "history", "literature",
-        "philosophy", "economics", "politics", "law", "art", "design",
-        
-        # Personal advice (non-smoking related)
-        "relationship", "dating", "marriage", "divorce", "parenting",
-        "career", "job", "interview", "resume", "salary",
-        
-        # Health topics unrelated to smoking
-        "diet", "exercise", "weight loss", "fitness", "yoga", "meditation",
-        "sleep", "stress", "anxiety", "depression", "therapy"
-    ]
+    # Science and education (non-health related)
+    "physics", "chemistry", "biology", "math", "history", "literature",
+    "philosophy", "economics", "politics", "law", "art", "design",
     
-    # Check if question matches non-smoking patterns
-    matches_non_smoking = any(pattern in question_lower for pattern in non_smoking_patterns)
+    # Personal advice (non-smoking related)
+    "relationship", "dating", "marriage", "divorce", "parenting",
+    "career", "job", "interview", "resume", "salary",
     
-    return matches_non_smoking
+    # Health topics unrelated to smoking
+    "diet", "exercise", "weight loss", "fitness", "yoga", "meditation",
+    "sleep", "stress", "anxiety", "depression", "therapy"
+]
+
+# Each list compiles to one alternation, so a question is scanned once per
+# list instead of once per keyword (plain substring matches, as before)
+_SMOKING_RE = re.compile("|".join(map(re.escape, _SMOKING_KEYWORDS)))
+_NON_SMOKING_RE = re.compile("|".join(map(re.escape, _NON_SMOKING_PATTERNS)))
+
+
+def _is_non_smoking_question(question: str) -> bool:
+    """Check if the question is clearly unrelated to smoking cessation."""
+    question_lower = question.lower().strip()
+
+    # If it has smoking keywords, it's likely related to smoking cessation
+    if _SMOKING_RE.search(question_lower):
+        return False
+
+    return _NON_SMOKING_RE.search(question_lower) is not None
 
 # Post-processing filter for non-smoking responses
 def _is_non_smoking_response(response_text: str, original_question: str) -> bool:
@@ -112,11 +119,59 @@ def _is_non_smoking_response(response_text: str, original_question: str) -> bool
     return False
 
 
+async def _fetch_all(stmt) -> Sequence:
+    """Run a select in its own session, so it can overlap other queries."""
+    async with async_session() as session:
+        return (await session.execute(stmt)).all()
+
+
+# lambda_stmt caches each statement's construction and compiled SQL; only
+# the user id and cutoff date change between requests, as bound parameters
+def _recent_cravings_stmt(user_id: int, since: date) -> StatementLambdaElement:
+    """The user's 20 latest cravings dated on or after `since`."""
+    return lambda_stmt(
+        lambda: select(
+            Craving.id,
+            Craving.date,
+            Craving.comments,
+            Craving.have_smoked,
+            Craving.desire_range,
+            Craving.number_of_cigarets_smoked,
+            Craving.feeling,
+            Craving.activity,
+            Craving.company,
+        )
+        .where(Craving.user_id == user_id)
+        .where(Craving.date >= since)
+        .order_by(Craving.date.desc())
+        .limit(20)
+    )
+
+
+def _recent_diary_stmt(user_id: int, since: date) -> StatementLambdaElement:
+    """The user's 20 latest diary entries dated on or after `since`."""
+    return lambda_stmt(
+        lambda: select(
+            Diary.id,
+            Diary.date,
+            Diary.notes,
+            Diary.have_smoked,
+            Diary.craving_range,
+            Diary.number_of_cravings,
+            Diary.number_of_cigarets_smoked,
+        )
+        .where(Diary.user_id == user_id)
+        .where(Diary.date >= since)
+        .order_by(Diary.date.desc())
+        .limit(20)
+    )
+
+
 def _get_smoking_refusal_response() -> str:
     """Get the standard refusal response for non-smoking questions."""
-    return "I'm sorry, but I can only help with smoking cessation and tobacco-related questions. I cannot answer questions about other topics. Is there anything about quitting smoking or managing tobacco cravings I can help you with instead?"
+    return STRICT_REFUSAL_MSG
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 EVENT_TOKEN = "token"
 EVENT_TOOL_CALL = "tool_call"
@@ -127,17 +182,18 @@ EVENT_ERROR = "error"
 def create_thread() -> ThreadOut:
     """Create a new chat thread for the user."""
     thread_id = str(uuid4())
-    logger.info(f"Created new chat thread: {thread_id}")
+    logger.info("Created new chat thread: %s", thread_id)
     return ThreadOut(thread_id=thread_id)
 
 
-@router.post("/threads/{thread_id}/stream", dependencies=[Depends(get_current_user)])
+@router.post("/threads/{thread_id}/stream")
 async def chat_stream(
     thread_id: str = Path(..., min_length=1),
     payload: ChatIn = Body(...),
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_with_preference),
     db: AsyncSession = Depends(get_async_db),
     raw_token: str = Security(oauth2_scheme),
+    agent=Depends(get_agent),
 ):
     """
     Streams assistant output and tool activity as Server-Sent Events.
@@ -158,16 +214,11 @@ async def chat_stream(
     # Get user's full preference information for context
     user_context = {}
     try:
-        from sqlalchemy.orm import selectinload
-        pref_result = await db.execute(
-            select(Preference)
-            .options(selectinload(Preference.goals))
-            .where(Preference.user_id == current_user.id)
-        )
-        preference = pref_result.scalar_one_or_none()
+        # Preference + goals arrive eager-loaded with the user
+        preference = current_user.preference
         
         if preference:
-            days_since_quit = (date.today() - preference.quit_date).days
+            days_since_quit = preference.days_smoke_free
             
             # Convert goals to dict format
             goals_data = []
@@ -192,38 +243,23 @@ async def chat_stream(
                 "language": preference.language or "en-us",
                 "goals": goals_data,
             }
-            logger.info(f"Loaded full user context for {current_user.id}: {days_since_quit} days smoke-free, {len(goals_data)} goals")
+            logger.info("Loaded full user context for %s: %s days smoke-free, %s goals", current_user.id, days_since_quit, len(goals_data))
         else:
-            logger.info(f"No preferences found for user {current_user.id}")
+            logger.info("No preferences found for user %s", current_user.id)
     except Exception as e:
-        logger.warning(f"Could not load user context: {e}")
+        logger.warning("Could not load user context: %s", e)
     
     # Load recent cravings and diary entries for additional context
     try:
-        from app.models.craving import Craving
-        from app.models.diary import Diary
-        from datetime import timedelta
-        
-        # Get recent cravings (last 30 days)
+        # Recent cravings and diary entries (last 30 days, 20 of each). The
+        # two reads are independent, so the diary query runs on a session of
+        # its own while the request session fetches the cravings. Only the
+        # columns sent to the agent are selected, as plain rows.
         recent_date = date.today() - timedelta(days=30)
-        cravings_result = await db.execute(
-            select(Craving)
-            .where(Craving.user_id == current_user.id)
-            .where(Craving.date >= recent_date)
-            .order_by(Craving.date.desc())
-            .limit(20)  # Limit to recent 20 entries
-        )
-        cravings = cravings_result.scalars().all()
-        
-        # Get recent diary entries (last 30 days)
-        diary_result = await db.execute(
-            select(Diary)
-            .where(Diary.user_id == current_user.id)
-            .where(Diary.date >= recent_date)
-            .order_by(Diary.date.desc())
-            .limit(20)  # Limit to recent 20 entries
+        cravings, diary_entries = await asyncio.gather(
+            db.execute(_recent_cravings_stmt(current_user.id, recent_date)),
+            _fetch_all(_recent_diary_stmt(current_user.id, recent_date)),
         )
-        diary_entries = diary_result.scalars().all()
         
         # Convert to dict format
         cravings_data = [
@@ -259,29 +295,26 @@ async def chat_stream(
             user_context["recent_cravings"] = cravings_data
             user_context["recent_diary_entries"] = diary_data
             
-        logger.info(f"Loaded activity data for {current_user.id}: {len(cravings_data)} cravings, {len(diary_data)} diary entries")
+        logger.info("Loaded activity data for %s: %s cravings, %s diary entries", current_user.id, len(cravings_data), len(diary_data))
         
     except Exception as e:
-        logger.warning(f"Could not load activity data: {e}")
+        logger.warning("Could not load activity data: %s", e)
     
     # Debug log the user_context
-    logger.info(f"Final user_context: {user_context}")
+    logger.info("Final user_context: %s", user_context)
     
     # SET CONTEXT IN GLOBAL TOOL - This ensures tools always have access to user data
     if user_context:
         user_context_tool.set_context(str(current_user.id), user_context)
-        logger.info(f"Set global context for user {current_user.id} with {len(user_context)} fields")
+        logger.info("Set global context for user %s with %s fields", current_user.id, len(user_context))
 
     cfg = {"configurable": {"thread_id": thread_id, "checkpoint_ns": "chat"}}
 
-    def gen() -> Generator[str, None, None]:
+    async def gen() -> AsyncGenerator[str, None]:
         try:
-            # PRE-PROCESSING: Check for obvious non-smoking questions
-            message_lower = payload.message.lower().strip()
-            
-            # Check if this is a non-smoking question and refuse immediately
+            # PRE-PROCESSING: Check if this is a non-smoking question and refuse immediately
             if _is_non_smoking_question(payload.message):
-                logger.info(f"Refusing non-smoking question: {payload.message[:100]}...")
+                logger.info("Refusing non-smoking question: %s...", payload.message[:100])
                 refusal_response = _get_smoking_refusal_response()
                 
                 # Stream the refusal response as if it came from the AI
@@ -310,34 +343,22 @@ async def chat_stream(
                     "recent_diary_entries": user_context.get("recent_diary_entries"),
                 }
                 initial_state.update(user_data)
-                
-                # FORCE CONTEXT PERSISTENCE: Ensure conversation_context gets refreshed with current data
-                # This prevents context loss when topics change and come back
-                if "conversation_context" not in initial_state:
-                    initial_state["conversation_context"] = {}
-                initial_state["conversation_context"].update(user_data)
-                
-                # CRITICAL: Also store context in a persistent way that survives message exchanges
-                # Store in both places to ensure it's never lost
-                for key, value in user_data.items():
-                    initial_state[key] = value
-                
-                logger.info(f"FORCE UPDATED both initial_state and conversation_context with {len(user_data)} fields")
-                logger.info(f"Context includes cravings: {bool(user_context.get('recent_cravings'))}")
+                logger.info("Passed %s user context fields to the agent", len(user_data))
+                logger.info("Context includes cravings: %s", bool(user_context.get('recent_cravings')))
                 if user_context.get('recent_cravings'):
-                    logger.info(f"Cravings count: {len(user_context['recent_cravings'])}")
+                    logger.info("Cravings count: %s", len(user_context['recent_cravings']))
             else:
                 logger.info("No user_context available - user likely needs to set up preferences")
             # Provide bearer token for API-backed tools (never echo it)
             initial_state["auth_token"] = raw_token
 
-            stream = agent.stream(
+            stream = agent.astream(
                 initial_state,
                 config=cfg,
                 stream_mode="messages",
             )
 
-            for msg, meta in stream:
+            async for msg, meta in stream:
                 node = meta.get("langgraph_node")
 
                 if node == "agent":
@@ -359,14 +380,14 @@ async def chat_stream(
                     yield _event(EVENT_TOOL_RESULT, tool=node, content=normalized)
                     
         except Exception as e:
-            logger.error(f"Error in chat stream for thread {thread_id}: {e}")
+            logger.error("Error in chat stream for thread %s: %s", thread_id, e)
             yield _event(EVENT_ERROR, message="An error occurred while processing your request. Please try again.")
 
     return sse(gen())
 
 
 @router.get("/health")
-async def chat_health_check():
+async def chat_health_check(agent=Depends(get_agent)):
     """Check if the chat service is available."""
     if agent is None:
         raise HTTPException(
@@ -1,15 +1,38 @@
 from datetime import date as date_cls
+from typing import AsyncIterator
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
-from sqlalchemy import desc, func, select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, desc, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.v1.dependencies.auth0 import get_current_user
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.core.routing import ORJSONRoute
+from app.db_config.db_async_session import async_session
 from app.models.craving import Craving
 from app.schemas.cravings import CravingIn, CravingListOut, CravingOut
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
+
+# Exactly the columns CravingOut exposes. Selecting them instead of the
+# entity keeps streamed rows out of the session's identity map.
+_CRAVING_OUT_COLUMNS = [getattr(Craving, name) for name in CravingOut.model_fields]
+
+
+async def _stream_cravings(stmt: Select, total: int) -> AsyncIterator[bytes]:
+    """Yield the CravingListOut JSON body one row at a time."""
+    yield b'{"total":%d,"cravings":[' % total
+    # The request's own session is closed before the body is sent, so the
+    # stream needs its own; yield_per fetches rows from a server-side cursor
+    async with async_session() as session:
+        result = await session.stream(stmt.execution_options(yield_per=200))
+        sep = b""
+        async for row in result:
+            yield sep + orjson.dumps(row._asdict())
+            sep = b","
+    yield b"]}"
 
 
 @router.get("/", response_model=CravingListOut, status_code=status.HTTP_200_OK)
@@ -19,8 +42,8 @@ async def list_cravings(
     day: str | None = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$"),
     db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
-) -> CravingListOut:
-    q = select(Craving).where(Craving.user_id == current_user.id)
+) -> Response:
+    q = select(*_CRAVING_OUT_COLUMNS).where(Craving.user_id == current_user.id)
 
     if day:
         try:
@@ -36,9 +59,12 @@ async def list_cravings(
         order_cols.append(desc(Craving.created_at))
     order_cols.append(desc(Craving.id))
 
-    result = await db.execute(q.order_by(*order_cols).offset(skip).limit(limit))
-    items = result.scalars().all()
-    return CravingListOut(cravings=items, total=total or 0)
+    # Rows come from our own table, so they are written out as they arrive
+    # rather than materialized and re-validated against response_model
+    stmt = q.order_by(*order_cols).offset(skip).limit(limit)
+    return StreamingResponse(
+        _stream_cravings(stmt, total or 0), media_type="application/json"
+    )
 
 
 @router.get("/{craving_id}", response_model=CravingOut, status_code=status.HTTP_200_OK)
@@ -57,7 +83,7 @@ async def get_craving(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Craving not found"
         )
-    return CravingOut.from_orm(craving)
+    return CravingOut.model_validate(craving)
 
 
 @router.post("/", response_model=CravingOut, status_code=status.HTTP_201_CREATED)
@@ -66,11 +92,11 @@ async def create_craving(
     db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ) -> CravingOut:
-    craving = Craving(**craving_in.dict(), user_id=current_user.id)
+    craving = Craving(**craving_in.model_dump(), user_id=current_user.id)
     db.add(craving)  # add/delete are not awaited
     await db.commit()
     await db.refresh(craving)
-    return CravingOut.from_orm(craving)
+    return CravingOut.model_validate(craving)
 
 
 @router.put("/{craving_id}", response_model=CravingOut, status_code=status.HTTP_200_OK)
@@ -91,12 +117,12 @@ async def update_craving(
             status_code=status.HTTP_404_NOT_FOUND, detail="Craving not found"
         )
 
-    for key, value in craving_update.dict(exclude_unset=True).items():
+    for key, value in craving_update.model_dump(exclude_unset=True).items():
         setattr(craving, key, value)
 
     await db.commit()
     await db.refresh(craving)
-    return CravingOut.from_orm(craving)
+    return CravingOut.model_validate(craving)
 
 
 @router.delete("/{craving_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -2,8 +2,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.api.v1.dependencies.agent import get_agent
 from app.api.v1.dependencies.async_db_session import get_async_db
-from app.services.ai.agent import agent
 
 router = APIRouter(tags=["healthcheck"])
 
@@ -22,7 +22,7 @@ async def readiness(db: AsyncSession = Depends(get_async_db)) -> dict:
 
 
 @router.get("/agent-health")
-async def agent_health() -> dict:
+async def agent_health(agent=Depends(get_agent)) -> dict:
     """Check if the AI agent is available and functioning."""
     if agent is None:
         return {"status": "unavailable", "agent_available": False}
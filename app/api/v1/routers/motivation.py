@@ -1,14 +1,15 @@
 from datetime import date
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
 
 from app.api.v1.dependencies.auth0 import get_current_user
 from app.api.v1.dependencies.async_db_session import get_async_db
 from app.models.motivation import DailyMotivation
 from app.models.user import User
-from app.schemas.motivation import DailyMotivationOut
+from app.schemas.motivation import MOTIVATION_LIST_ADAPTER, DailyMotivationOut
 from app.services.motivation_service import generate_and_save_for_user
 
 router = APIRouter()
@@ -24,6 +25,7 @@ async def detailed_text(
 
     stmt = (
         select(DailyMotivation)
+        .options(undefer(DailyMotivation.payload))
         .where(
             DailyMotivation.user_id == current_user.id,
             DailyMotivation.date == today,
@@ -50,13 +52,22 @@ async def list_motivations(
 ):
     stmt = (
         select(DailyMotivation)
+        .options(undefer(DailyMotivation.payload))
         .where(DailyMotivation.user_id == current_user.id)
         .order_by(DailyMotivation.date.desc(), DailyMotivation.created_at.desc())
         .offset(skip)
         .limit(limit)
     )
     res = await db.execute(stmt)
-    return res.unique().scalars().all()
+    # Validate and dump the whole page through the shared adapter and return
+    # a Response so FastAPI doesn't run its own response_model pass on top
+    items = MOTIVATION_LIST_ADAPTER.validate_python(
+        res.unique().scalars().all(), from_attributes=True
+    )
+    return Response(
+        content=MOTIVATION_LIST_ADAPTER.dump_json(items),
+        media_type="application/json",
+    )
 
 
 @router.get("/count", response_model=int)
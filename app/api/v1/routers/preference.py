@@ -1,20 +1,31 @@
 from datetime import date, datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import delete, select
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.api.v1.dependencies.auth0 import get_current_user
+from app.api.v1.dependencies.auth0 import (
+    get_current_user,
+    get_current_user_with_preference,
+)
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.core.cache import (
+    PREFERENCE_CACHE_TTL,
+    cache_delete,
+    cache_get,
+    cache_set,
+    preference_cache_key,
+)
+from app.core.routing import ORJSONRoute
 from app.models.goal import Goal
 from app.models.motivation import DailyMotivation
 from app.models.preference import Preference
 from app.schemas.preference import PreferenceCreate, PreferenceOut, PreferenceUpdate
 from app.services.motivation_service import generate_and_save_for_user
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 
 @router.get("/", response_model=PreferenceOut, status_code=status.HTTP_200_OK)
@@ -22,6 +33,12 @@ async def list_preference(
     db: AsyncSession = Depends(get_async_db),
     current_user=Depends(get_current_user),
 ) -> PreferenceOut:
+    # Serve the already-serialized body when we have it
+    cache_key = preference_cache_key(current_user.id)
+    cached = await cache_get(cache_key)
+    if cached is not None:
+        return Response(content=cached, media_type="application/json")
+
     # Eager-load goals to avoid async lazy-loads
     res = await db.execute(
         select(Preference)
@@ -33,7 +50,10 @@ async def list_preference(
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No preference set"
         )
-    return preference
+
+    body = PreferenceOut.model_validate(preference).model_dump_json()
+    await cache_set(cache_key, body, PREFERENCE_CACHE_TTL)
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("/", response_model=PreferenceOut, status_code=status.HTTP_201_CREATED)
@@ -57,16 +77,27 @@ async def create_preferences(
         quit_date=pref_in.quit_date,
     )
 
-    for goal_data in pref_in.goals or []:
-        goal = Goal(
-            description=goal_data.description,
-            is_completed=goal_data.is_completed,
+    db.add(pref)
+    await db.flush()  # assigns pref.id
+
+    # One multi-VALUES INSERT for all goals instead of per-object ORM state
+    if pref_in.goals:
+        await db.execute(
+            insert(Goal),
+            [
+                {
+                    "preference_id": pref.id,
+                    "description": goal_data.description,
+                    "is_completed": goal_data.is_completed,
+                }
+                for goal_data in pref_in.goals
+            ],
         )
-        pref.goals.append(goal)
 
-    db.add(pref)
     await db.commit()
-    await db.refresh(pref)
+    await cache_delete(preference_cache_key(current_user.id))
+    # Goals were written through Core, so load the collection explicitly
+    await db.refresh(pref, attribute_names=["goals"])
 
     # Generate today's motivation (async service)
     await generate_and_save_for_user(db=db, user_id=current_user.id)
@@ -77,15 +108,10 @@ async def create_preferences(
 async def update_preferences(
     pref_in: PreferenceUpdate,
     db: AsyncSession = Depends(get_async_db),
-    current_user=Depends(get_current_user),
+    current_user=Depends(get_current_user_with_preference),
 ) -> PreferenceOut:
-    # Load current preference + goals
-    res = await db.execute(
-        select(Preference)
-        .options(selectinload(Preference.goals))
-        .where(Preference.user_id == current_user.id)
-    )
-    pref = res.scalar_one_or_none()
+    # Preference + goals arrive eager-loaded with the user
+    pref = current_user.preference
     if not pref:
         raise HTTPException(status_code=404, detail="Preferences not found")
 
@@ -130,6 +156,7 @@ async def update_preferences(
         pref.goals[:] = new_list
 
     await db.commit()
+    await cache_delete(preference_cache_key(current_user.id))
     await db.refresh(pref)
 
     # trigger only if client sent quit_date AND it changed
@@ -1,16 +1,20 @@
-import anyio
 import httpx
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import delete
+from sqlalchemy import delete, update
 
 from app.api.v1.dependencies.auth0 import (
     can_update_email,
+    get_auth0_http,
     get_current_user,
+    get_m2m_token,
     update_user_email,
 )
 from app.api.v1.dependencies.async_db_session import get_async_db
+from app.core.cache import cache_delete, preference_cache_key
+from app.core.routing import ORJSONRoute
 from app.models.user import User as UserModel
 from app.models.craving import Craving
 from app.models.diary import Diary
@@ -19,15 +23,21 @@ from app.models.motivation import DailyMotivation
 from app.models.user_badge import user_badges
 from app.schemas.user import UserOut, UserUpdate
 
-router = APIRouter()
+router = APIRouter(route_class=ORJSONRoute)
 
 
 @router.get("/me", response_model=UserOut, status_code=status.HTTP_200_OK)
 async def read_current_user(
     current_user: UserModel = Depends(get_current_user),
-) -> UserModel:
+) -> ORJSONResponse:
     """Return the currently authenticated user."""
-    return current_user
+    # Returning a Response skips FastAPI's second validation pass against
+    # response_model, which is kept only for the OpenAPI schema
+    return ORJSONResponse(
+        UserOut.model_validate(current_user, from_attributes=True).model_dump(
+            mode="json"
+        )
+    )
 
 
 @router.patch("/me", response_model=UserOut, status_code=status.HTTP_200_OK)
@@ -35,25 +45,31 @@ async def update_current_user(
     user_update: UserUpdate,
     db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_user),
+    http: httpx.AsyncClient = Depends(get_auth0_http),
 ) -> UserModel:
     """
     Update the current user's profile.
     If `email` is included, we first sync it with Auth0, then mirror locally.
-    """
-    # Re-load the user in THIS session to avoid cross-session state issues
-    user = await db.get(UserModel, current_user.id)
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
+    The Auth0 round-trips run with no pooled connection checked out: the
+    session is closed before the external calls and the user is re-loaded
+    afterwards, so slow Auth0 responses don't pin a DB connection.
+    """
+    auth0_id = current_user.auth0_id
+    user_id = current_user.id
     data = user_update.model_dump(exclude_unset=True)
 
-    # 1) Email change → Auth0 → local DB
-    if "email" in data:
-        new_email = data.pop("email")
-
-        # Only allow native DB users (Auth0 "auth0" provider)
-        can_update = await anyio.to_thread.run_sync(can_update_email, user.auth0_id)
-        if not can_update:
+    # 1) Email change → Auth0 (outside any DB transaction)
+    email_changed = "email" in data
+    new_email = data.pop("email", None)
+    if email_changed:
+        # Return the connection held since the auth lookup to the pool
+        await db.close()
+
+        # Only allow native DB users (Auth0 "auth0" provider); one Management
+        # API token serves both the check and the update
+        mgmt_token = await get_m2m_token(http)
+        if not await can_update_email(http, auth0_id, token=mgmt_token):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=(
@@ -63,8 +79,7 @@ async def update_current_user(
             )
 
         try:
-            # Offload blocking HTTP call
-            await anyio.to_thread.run_sync(update_user_email, user.auth0_id, new_email)
+            await update_user_email(http, auth0_id, new_email, token=mgmt_token)
         except httpx.HTTPStatusError as exc:
             detail = exc.response.json().get("message", exc.response.text)
             raise HTTPException(
@@ -72,15 +87,30 @@ async def update_current_user(
                 detail=f"Auth0 rejected email change: {detail}",
             ) from exc
 
-        user.email = new_email
-
-    # 2) Other updatable fields (never allow ID fields)
+    # Never allow ID fields
     data.pop("auth0_id", None)
-    for field, value in data.items():
-        setattr(user, field, value)
 
-    # 3) Persist and return
+    # 2) Apply the changes and persist
     try:
+        if email_changed:
+            # Re-load the user in a fresh transaction
+            user = await db.get(UserModel, user_id)
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            user.email = new_email
+            for field, value in data.items():
+                setattr(user, field, value)
+        elif data:
+            # Scalar-only patch: one UPDATE ... RETURNING, no SELECT first
+            result = await db.execute(
+                update(UserModel)
+                .where(UserModel.id == user_id)
+                .values(**data)
+                .returning(UserModel)
+            )
+            user = result.scalar_one()
+        else:
+            return current_user
         await db.commit()
     except IntegrityError as e:
         await db.rollback()
@@ -88,7 +118,9 @@ async def update_current_user(
         if "unique" in msg and "email" in msg:
             raise HTTPException(status_code=400, detail="Email already in use") from e
         raise
-    await db.refresh(user)
+
+    if email_changed:
+        await db.refresh(user)
 
     return user
 
@@ -131,6 +163,7 @@ async def reset_user_data(
         
         # Commit all deletions
         await db.commit()
+        await cache_delete(preference_cache_key(current_user.id))
         
     except Exception as e:
         await db.rollback()
@@ -0,0 +1,48 @@
+import logging
+from typing import Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Short timeouts: the cache is an optimisation, never a reason to stall a request
+redis = Redis.from_url(
+    settings.redis_url,
+    socket_timeout=0.5,
+    socket_connect_timeout=0.5,
+)
+
+PREFERENCE_CACHE_TTL = 60 * 60  # seconds
+
+
+def preference_cache_key(user_id: int) -> str:
+    """Key holding the serialized PreferenceOut JSON for a user."""
+    return f"pref:{user_id}"
+
+
+async def cache_get(key: str) -> Optional[bytes]:
+    """Return the cached bytes for `key`, or None on a miss or Redis error."""
+    try:
+        return await redis.get(key)
+    except RedisError:
+        logger.warning("Redis GET failed for %s", key, exc_info=True)
+        return None
+
+
+async def cache_set(key: str, value: bytes, ttl: int) -> None:
+    """Store `value` under `key` for `ttl` seconds; errors are logged and ignored."""
+    try:
+        await redis.set(key, value, ex=ttl)
+    except RedisError:
+        logger.warning("Redis SET failed for %s", key, exc_info=True)
+
+
+async def cache_delete(*keys: str) -> None:
+    """Invalidate `keys`; errors are logged and ignored."""
+    try:
+        await redis.delete(*keys)
+    except RedisError:
+        logger.warning("Redis DEL failed for %s", keys, exc_info=True)
@@ -1,9 +1,12 @@
+import json
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, List
+from typing import Annotated, Any, Literal, Optional, Tuple
 
 from dotenv import load_dotenv
-from pydantic.v1 import BaseSettings, Field
+from pydantic import Field, ValidationInfo, field_validator
+from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 # BASE_DIR is one level above app/
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -25,52 +28,116 @@ class Settings(BaseSettings):
     postgres_user: str = os.getenv("POSTGRES_USER", "postgres")
     postgres_password: str = os.getenv("POSTGRES_PASSWORD", "password")
     postgres_db: str = os.getenv("POSTGRES_DB", "db")
-    sqlalchemy_database_uri: str = ""  # built in __init__
+    # built from the postgres_* fields when not set explicitly
+    sqlalchemy_database_uri: str = Field("", validate_default=True)
     database_url: str = os.getenv(
         "DATABASE_URL", "postgresql+asyncpg://postgres:example@db:5432/db"
     )
-    db_eco: str = False
+    db_eco: bool = False
     # Redis
     redis_url: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
     # Auth0
     auth0_domain: str = os.getenv("AUTH0_DOMAIN", "")
     auth0_api_audience: str = os.getenv("AUTH0_API_AUDIENCE", "ss_api")
-    auth0_client_id: str = os.getenv("AUTH0_CLIENT_ID")
+    auth0_client_id: Optional[str] = os.getenv("AUTH0_CLIENT_ID")
     auth0_mgmt_client_id: str = os.getenv("AUTH0_MGMT_CLIENT_ID", "")
     auth0_mgmt_client_secret: str = os.getenv("AUTH0_MGMT_CLIENT_SECRET", "")
     auth0_mgmt_audience: str = os.getenv("AUTH0_MGMT_AUDIENCE", "")
 
-    # CORS: comma-separated list in your .env
-    backends_cors_origins: List[str] = Field(
-        default=["http://localhost:3000", "http://localhost:8000"],
-        env="BACKENDS_CORS_ORIGINS",
+    # CORS: comma-separated list (or JSON array) in your .env
+    backends_cors_origins: Annotated[Tuple[str, ...], NoDecode] = Field(
+        default=("http://localhost:3000", "http://localhost:8000"),
+        validation_alias="BACKENDS_CORS_ORIGINS",
     )
 
     # OpenAI
-    openai_api_key: str = Field(..., env="OPENAI_API_KEY")
-    langgraph_database_url: str = Field(..., env="LANGGRAPH_DATABASE_URL")
+    openai_api_key: str = Field(..., validation_alias="OPENAI_API_KEY")
+    # Client-side limits for the motivation job's OpenAI calls; match them to
+    # the account's tier so bursts queue instead of failing with 429s
+    openai_rpm_limit: int = Field(500, gt=0, validation_alias="OPENAI_RPM_LIMIT")
+    openai_tpm_limit: int = Field(200_000, gt=0, validation_alias="OPENAI_TPM_LIMIT")
+    langgraph_database_url: str = Field(..., validation_alias="LANGGRAPH_DATABASE_URL")
     
     # Tavily Search API
-    tavily_api_key: str = Field(..., env="TAVILY_API_KEY")
+    tavily_api_key: str = Field(..., validation_alias="TAVILY_API_KEY")
+    # How structured agent tools (health calculator, research search) report
+    # results: readable lines, or compact JSON that costs fewer prompt tokens
+    tool_output_format: Literal["text", "json"] = Field(
+        "text", validation_alias="TOOL_OUTPUT_FORMAT"
+    )
     
     # Scheduler timezone
-    timezone: str = Field("America/Sao_Paulo", env="TIMEZONE")
+    timezone: str = Field("America/Sao_Paulo", validation_alias="TIMEZONE")
+    # Scheduler job cadence
+    motivation_interval_hours: int = Field(
+        8, gt=0, validation_alias="MOTIVATION_INTERVAL_HOURS"
+    )
+    badge_interval_minutes: int = Field(
+        24 * 60, gt=0, validation_alias="BADGE_INTERVAL_MINUTES"
+    )
+    # Users whose daily motivation is generated at the same time
+    motivation_max_concurrency: int = Field(
+        8, gt=0, validation_alias="MOTIVATION_MAX_CONCURRENCY"
+    )
+    # Submit the daily motivations as one OpenAI Batch API job (half price,
+    # results within 24h) instead of one live request per user
+    motivation_batch_api: bool = Field(False, validation_alias="MOTIVATION_BATCH_API")
+    motivation_batch_poll_minutes: int = Field(
+        15, gt=0, validation_alias="MOTIVATION_BATCH_POLL_MINUTES"
+    )
+    # Completion budget per motivation. Replies run ~1k tokens; a reply cut
+    # off at the limit is invalid JSON and the generation fails
+    motivation_max_tokens: int = Field(
+        1200, gt=0, validation_alias="MOTIVATION_MAX_TOKENS"
+    )
+    # Reuse a motivation generated for another user with the same language,
+    # reason, goals and quit week instead of calling the model again
+    motivation_reuse_cache: bool = Field(
+        True, validation_alias="MOTIVATION_REUSE_CACHE"
+    )
+    # Users of the same language generated by one completion in the daily
+    # job; below 3 every user gets their own request
+    motivation_group_size: int = Field(
+        1, ge=1, le=8, validation_alias="MOTIVATION_GROUP_SIZE"
+    )
+
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        env_file_encoding="utf-8",
+        case_sensitive=True,
+        extra="ignore",
+        frozen=True,
+    )
+
+    @field_validator("sqlalchemy_database_uri")
+    @classmethod
+    def build_sqlalchemy_database_uri(cls, v: str, info: ValidationInfo) -> str:
+        if v:
+            return v
+        values = info.data
+        return (
+            f"postgresql://{values.get('postgres_user')}:"
+            f"{values.get('postgres_password')}@{values.get('postgres_server')}:5432/"
+            f"{values.get('postgres_db')}"
+        )
+
+    @field_validator("backends_cors_origins", mode="before")
+    @classmethod
+    def split_cors_origins(cls, v: Any) -> Any:
+        if isinstance(v, str):
+            v = v.strip()
+            if v.startswith("["):
+                return tuple(json.loads(v))
+            return tuple(origin.strip() for origin in v.split(",") if origin.strip())
+        return v
 
-    class Config:
-        env_file = ".env"
-        env_file_encoding = "utf-8"
-        case_sensitive = True
 
-    def __init__(self, **kwargs: Any):
-        super().__init__(**kwargs)
-        if not self.sqlalchemy_database_uri:
-            self.sqlalchemy_database_uri = (
-                f"postgresql://{self.postgres_user}:"
-                f"{self.postgres_password}@{self.postgres_server}:5432/"
-                f"{self.postgres_db}"
-            )
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Build the settings once per process; use as a FastAPI dependency."""
+    return Settings()
 
 
-# instantiate once
-settings = Settings()
+# module-level handle for code outside request scope
+settings = get_settings()
@@ -4,12 +4,97 @@ based on days since smoking cessation.
 """
 
 import math
+from typing import Callable, Dict, Final, Tuple
 
+# Model constants, folded so each formula is a single exp() plus multiplies
+_TAU_NIC_INV: Final = math.log(2) * 24 / 2  # half-life 2 h, per day
+_TAU_CO_INV: Final = math.log(2) * 1440 / 300  # half-life 5 h, per day
+# Risk models: rr(t) = (1 - rr_inf) * exp(K * days) + rr_inf, months = days / 30
+_HEART_RR_INF: Final = 0.5
+_HEART_K: Final = -math.log(2) / (12 * 30)  # half-life 12 months
+_LUNG_RR_INF: Final = 0.03
+_LUNG_K: Final = -1 / (162 * 30)  # tau 162 months
+_LUNG_SCALE: Final = 1 / (1 - _LUNG_RR_INF)
 
-def _assert_non_negative(days_since_quit: int) -> int:
-    if days_since_quit < 0:
+
+def _exp_index(days_since_quit: int, tau_inv: float) -> int:
+    if days_since_quit <= 0:
+        return 0
+    return round(min(100 * (1 - math.exp(-days_since_quit * tau_inv)), 100))
+
+
+def _linear_index(days_since_quit: int, full_recovery_days: int) -> int:
+    if days_since_quit <= 0:
+        return 0
+    return round(min(days_since_quit / full_recovery_days * 100, 100))
+
+
+def _risk_index(days_since_quit: int, rr_inf: float, k: float, scale: float) -> int:
+    if days_since_quit <= 0:
         return 0
-    return days_since_quit
+    rr_t = (1 - rr_inf) * math.exp(k * days_since_quit) + rr_inf
+    return round(min((1 - rr_t) * scale * 100, 100))
+
+
+# Curve families every metric is built from
+_EXP = "exp"  # params: (tau_inv,)
+_LINEAR = "linear"  # params: (full_recovery_days,)
+_RISK = "risk"  # params: (rr_inf, k, 1 / (1 - rr_inf))
+
+_CURVES: Dict[str, Callable[..., int]] = {
+    _EXP: _exp_index,
+    _LINEAR: _linear_index,
+    _RISK: _risk_index,
+}
+
+# One row per HealthOut index, keyed by field name. Heart attack shares the
+# heart-disease curve and life regained is not an index, so neither is listed.
+_METRICS: Tuple[Tuple[str, str, Tuple[float, ...]], ...] = (
+    ("nicotine_expelled", _EXP, (_TAU_NIC_INV,)),
+    ("carbon_monoxide_level", _EXP, (_TAU_CO_INV,)),
+    ("pulse_rate", _LINEAR, (1,)),
+    ("oxygen_levels", _LINEAR, (3,)),
+    ("taste_and_smell", _LINEAR, (60,)),
+    ("breathing", _LINEAR, (90,)),
+    ("energy_levels", _LINEAR, (90,)),
+    ("circulation", _LINEAR, (90,)),
+    ("gum_texture", _LINEAR, (180,)),
+    ("immunity_and_lung_function", _LINEAR, (14,)),
+    (
+        "reduced_risk_of_heart_disease",
+        _RISK,
+        (_HEART_RR_INF, _HEART_K, 1 / (1 - _HEART_RR_INF)),
+    ),
+    ("decreased_risk_of_lung_cancer", _RISK, (_LUNG_RR_INF, _LUNG_K, _LUNG_SCALE)),
+)
+_METRIC_CURVES: Dict[str, Tuple[str, Tuple[float, ...]]] = {
+    name: (kind, params) for name, kind, params in _METRICS
+}
+
+# Indices only depend on the whole number of days, so each curve is
+# evaluated once over [0, _TABLE_SIZE) at import and looked up afterwards.
+# Days outside the table fall back to the formula (the lung-cancer curve
+# is still rising past day 4000).
+_TABLE_SIZE = 4000
+
+
+def _build_table(
+    kind: str, params: Tuple[float, ...], size: int = _TABLE_SIZE
+) -> Tuple[int, ...]:
+    curve = _CURVES[kind]
+    return tuple(curve(days, *params) for days in range(size))
+
+
+_TABLES: Dict[str, Tuple[int, ...]] = {
+    name: _build_table(kind, params) for name, kind, params in _METRICS
+}
+
+
+def _index(name: str, days_since_quit: int) -> int:
+    if 0 <= days_since_quit < _TABLE_SIZE:
+        return _TABLES[name][days_since_quit]
+    kind, params = _METRIC_CURVES[name]
+    return _CURVES[kind](days_since_quit, *params)
 
 
 def calculate_nicotine_expelled(days_since_quit: int) -> int:
@@ -17,13 +102,7 @@ def calculate_nicotine_expelled(days_since_quit: int) -> int:
     Returns a recovery index for nicotine elimination based on days since quitting.
     Source: Benowitz et al. (2009), Handbook of Experimental Pharmacology (Elimination half-life ≈2 h) :contentReference[oaicite:12]{index=12}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    # half-life = 2 hours → tau = half_life / ln(2)
-    tau_days = (2 / math.log(2)) / 24
-    index = 100 * (1 - math.exp(-days_since_quit / tau_days))
-    return round(min(index, 100))
+    return _index("nicotine_expelled", days_since_quit)
 
 
 def calculate_carbon_monoxide_level(days_since_quit: int) -> int:
@@ -31,12 +110,7 @@ def calculate_carbon_monoxide_level(days_since_quit: int) -> int:
     Returns a recovery index for blood CO levels based on days since quitting.
     Source: Hanley ME. StatPearls (2023), Carboxyhemoglobin half-life ~4–6 h :contentReference[oaicite:13]{index=13}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    tau_days = (5 * 60) / math.log(2) / 1440  # 5 h avg
-    index = 100 * (1 - math.exp(-days_since_quit / tau_days))
-    return round(min(index, 100))
+    return _index("carbon_monoxide_level", days_since_quit)
 
 
 def calculate_pulse_rate(days_since_quit: int) -> int:
@@ -44,10 +118,7 @@ def calculate_pulse_rate(days_since_quit: int) -> int:
     Returns a recovery index for pulse rate based on days since quitting.
     Source: Persico AM et al. (1992), Psychopharmacology; 9 bpm drop by day 1 :contentReference[oaicite:14]{index=14}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 1 * 100, 100))
+    return _index("pulse_rate", days_since_quit)
 
 
 def calculate_oxygen_levels(days_since_quit: int) -> int:
@@ -55,10 +126,7 @@ def calculate_oxygen_levels(days_since_quit: int) -> int:
     Returns a recovery index for blood oxygen levels based on days since quitting.
     Source: U.S. Surgeon General (2020), benefits normalizing within 1–3 days :contentReference[oaicite:15]{index=15}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 3 * 100, 100))
+    return _index("oxygen_levels", days_since_quit)
 
 
 def calculate_taste_and_smell(days_since_quit: int) -> int:
@@ -66,10 +134,7 @@ def calculate_taste_and_smell(days_since_quit: int) -> int:
     Returns a recovery index for taste and smell based on days since quitting.
     Source: Da Ré S et al. (2017), J Comp Physiol A—sensitivity recovers by ~60 days :contentReference[oaicite:16]{index=16}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 60 * 100, 100))
+    return _index("taste_and_smell", days_since_quit)
 
 
 def calculate_breathing(days_since_quit: int) -> int:
@@ -77,10 +142,7 @@ def calculate_breathing(days_since_quit: int) -> int:
     Returns a recovery index for pulmonary function based on days since quitting.
     Source: U.S. Surgeon General (2020), lung function improves by 3 months :contentReference[oaicite:17]{index=17}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 90 * 100, 100))
+    return _index("breathing", days_since_quit)
 
 
 def calculate_energy_levels(days_since_quit: int) -> int:
@@ -88,10 +150,7 @@ def calculate_energy_levels(days_since_quit: int) -> int:
     Returns a recovery index for energy levels based on days since quitting.
     Source: Bao et al. (2024), Nicotine withdrawal and exercise performance improve by 3 months :contentReference[oaicite:18]{index=18}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 90 * 100, 100))
+    return _index("energy_levels", days_since_quit)
 
 
 def calculate_circulation(days_since_quit: int) -> int:
@@ -99,10 +158,7 @@ def calculate_circulation(days_since_quit: int) -> int:
     Returns a recovery index for peripheral circulation based on days since quitting.
     Source: U.S. Surgeon General (2020), circulation improves by 3 months :contentReference[oaicite:19]{index=19}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 90 * 100, 100))
+    return _index("circulation", days_since_quit)
 
 
 def calculate_gum_texture(days_since_quit: int) -> int:
@@ -110,10 +166,7 @@ def calculate_gum_texture(days_since_quit: int) -> int:
     Returns a recovery index for gum health based on days since quitting.
     Source: Duarte PM et al. (2021), J Clin Periodontol—periodontal health improves by 6 months :contentReference[oaicite:20]{index=20}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 180 * 100, 100))
+    return _index("gum_texture", days_since_quit)
 
 
 def calculate_immunity_and_lung_function(days_since_quit: int) -> int:
@@ -121,10 +174,7 @@ def calculate_immunity_and_lung_function(days_since_quit: int) -> int:
     Returns a recovery index for immune and lung defense based on days since quitting.
     Source: Darabseh A et al. (2021), Clin Exp Immunol—markers normalize within 14 days :contentReference[oaicite:21]{index=21}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    return round(min(days_since_quit / 14 * 100, 100))
+    return _index("immunity_and_lung_function", days_since_quit)
 
 
 def calculate_reduced_risk_of_heart_disease(days_since_quit: int) -> int:
@@ -132,16 +182,7 @@ def calculate_reduced_risk_of_heart_disease(days_since_quit: int) -> int:
     Returns a recovery index for coronary heart disease risk based on days since quitting.
     Source: U.S. Surgeon General (2020), risk halved by ~12 months :contentReference[oaicite:22]{index=22}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    # Exponential decay: half-life = 12 months
-    t_months = days_since_quit / 30
-    rr_inf = 0.5
-    tau = 12 / math.log(2)
-    rr_t = (1 - rr_inf) * math.exp(-t_months / tau) + rr_inf
-    index = (1 - rr_t) / (1 - rr_inf) * 100
-    return round(min(index, 100))
+    return _index("reduced_risk_of_heart_disease", days_since_quit)
 
 
 def calculate_decreased_risk_of_lung_cancer(days_since_quit: int) -> int:
@@ -149,15 +190,7 @@ def calculate_decreased_risk_of_lung_cancer(days_since_quit: int) -> int:
     Returns a recovery index for lung cancer risk based on days since quitting.
     Source: Peto R et al. (2000), Int J Epidemiol; exponential model rr∞=0.03, τ=162 months :contentReference[oaicite:23]{index=23}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
-        return 0
-    t_months = days_since_quit / 30
-    rr_inf = 0.03
-    tau = 162
-    rr_t = (1 - rr_inf) * math.exp(-t_months / tau) + rr_inf
-    index = (1 - rr_t) / (1 - rr_inf) * 100
-    return round(min(index, 100))
+    return _index("decreased_risk_of_lung_cancer", days_since_quit)
 
 
 def calculate_decreased_risk_of_heart_attack(days_since_quit: int) -> int:
@@ -177,11 +210,28 @@ def calculate_life_regained_in_hours(days_since_quit: int) -> int:
     - Department of Health & Social Care/UCL (2024): every cigarette costs ~20 min of life :contentReference[oaicite:17]{index=17}
     - People.com (2025): typical consumption ~10 cigarettes/day → ~200 min regained/day :contentReference[oaicite:18]{index=18}
     """
-    has_not_started = _assert_non_negative(days_since_quit)
-    if has_not_started == 0:
+    if days_since_quit <= 0:
         return 0
     minutes_per_cigarette = 20
     cigarettes_per_day = 10
     hours_per_day_regained = (cigarettes_per_day * minutes_per_cigarette) / 60
     total_hours = days_since_quit * hours_per_day_regained
     return round(total_hours)
+
+
+def compute_all(days_since_quit: int) -> Dict[str, int]:
+    """
+    Returns every HealthOut metric for a single user in one pass over the
+    metric table, keyed by field name.
+    """
+    if 0 <= days_since_quit < _TABLE_SIZE:
+        result = {name: table[days_since_quit] for name, table in _TABLES.items()}
+    else:
+        result = {
+            name: _CURVES[kind](days_since_quit, *params)
+            for name, kind, params in _METRICS
+        }
+    result["decreased_risk_of_heart_attack"] = result["reduced_risk_of_heart_disease"]
+    result["life_regained_in_hours"] = calculate_life_regained_in_hours(days_since_quit)
+    return result
+
@@ -0,0 +1,32 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+
+def setup_queue_logging(level: int = logging.INFO) -> QueueListener:
+    """
+    Route root logging through an in-memory queue.
+
+    Callers (including code running on the event loop) only enqueue the
+    record; formatting and the blocking write to stderr happen on the
+    listener's background thread. Stop the returned listener on shutdown
+    to flush what is left in the queue.
+    """
+    root = logging.getLogger()
+    handlers = root.handlers[:]
+    if not handlers:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [stream_handler]
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -3,6 +3,10 @@ from typing import Any
 from app.core.config import settings
 
 
+def _is_token_query_param(param: dict) -> bool:
+    return param.get("name") == "token" and param.get("in") == "query"
+
+
 def custom_openapi(app) -> Any:
     if app.openapi_schema:
         return app.openapi_schema
@@ -32,11 +36,11 @@ def custom_openapi(app) -> Any:
     # Remove legacy token parameters
     for path_item in schema.get("paths", {}).values():
         for operation in path_item.values():
-            params = operation.get("parameters", [])
-            operation["parameters"] = [
-                p
-                for p in params
-                if not (p.get("name") == "token" and p.get("in") == "query")
-            ]
+            params = operation.get("parameters")
+            # most operations have no token param, so skip the rebuild for them
+            if params and any(_is_token_query_param(p) for p in params):
+                operation["parameters"] = [
+                    p for p in params if not _is_token_query_param(p)
+                ]
     app.openapi_schema = schema
     return schema
@@ -5,6 +5,21 @@ from app.core.config import settings
 engine = create_async_engine(
     settings.database_url,
     future=True,
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=1800,
+    # Checkout-time ping drops connections the server or a proxy has closed
+    pool_pre_ping=True,
+    # Reuse the most recently returned connection to keep the hot set small
+    pool_use_lifo=True,
+    # Rows per multi-VALUES statement for insert(Model) + list executemany
+    insertmanyvalues_page_size=1000,
+    connect_args={
+        # asyncpg's per-connection prepared statement cache
+        "statement_cache_size": 1024,
+        # SQLAlchemy's asyncpg dialect cache of prepared statement handles
+        "prepared_statement_cache_size": 512,
+    },
 )
 
 async_session = async_sessionmaker(
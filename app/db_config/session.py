@@ -16,9 +16,17 @@ from app.db_config.db_async_session import async_session
 
 # 1 Create the SQAlchemy Engine
 # pool_pre_ping=True ensures stale connections are recycled.
+# pool_recycle retires connections by age; LIFO checkout keeps the set of
+# hot connections small. Bulk inserts are sent as multi-VALUES statements
+# of up to 1000 rows each.
 engine = create_engine(
     settings.sqlalchemy_database_uri,
+    pool_size=20,
+    max_overflow=40,
+    pool_recycle=1800,
     pool_pre_ping=True,
+    pool_use_lifo=True,
+    insertmanyvalues_page_size=1000,
 )
 
 # 2. Create a configured "SessionLocal" class
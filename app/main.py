@@ -1,5 +1,10 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+
+from app.api.v1.dependencies.auth0 import create_auth0_http
 
 from app.api.v1.routers import (
     badges,
@@ -13,12 +18,36 @@ from app.api.v1.routers import (
     chat,
 )
 from app.core.config import settings
+from app.core.logging_config import setup_queue_logging
 from app.core.openapi import custom_openapi
+from app.services.ai.agent import create_agent
+from app.services.motivation_service import MOTIVATION_MODEL
+from app.services.openai_limiter import load_encoding
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    log_listener = setup_queue_logging()
+    # One keep-alive Auth0 client for the whole process
+    app.state.auth0_http = create_auth0_http()
+    # Fetch the token-count encoding before the first motivation request
+    await load_encoding(MOTIVATION_MODEL)
+    try:
+        # The chat agent's async checkpointer connections belong to this loop
+        async with AsyncExitStack() as agent_resources:
+            app.state.agent = await create_agent(agent_resources)
+            yield
+    finally:
+        await app.state.auth0_http.aclose()
+        log_listener.stop()
 
 
 def create_app() -> FastAPI:
     app = FastAPI(
         title=settings.app_name,
+        lifespan=lifespan,
+        # Serialize every response body with orjson instead of stdlib json
+        default_response_class=ORJSONResponse,
         openapi_url=f"{settings.api_v1_str}/openapi.json",
         docs_url=f"{settings.api_v1_str}/docs",
         swagger_ui_init_oauth={
@@ -92,8 +121,8 @@ def create_app() -> FastAPI:
         tags=["badge"],
     )
 
-    # Custom OpenAPI
-    app.openapi = lambda: custom_openapi(app)
+    # Custom OpenAPI, built once; FastAPI serves app.openapi_schema as-is
+    app.openapi_schema = custom_openapi(app)
 
     return app
 
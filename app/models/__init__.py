@@ -0,0 +1,27 @@
+"""
+Single registry of ORM models.
+
+Importing this package registers every mapped class and table on
+Base.metadata exactly once, so string relationship targets ("User",
+"Preference") always resolve and Alembic sees the full schema.
+"""
+
+from app.models.user_badge import user_badges
+from app.models.badge import Badge
+from app.models.craving import Craving
+from app.models.diary import Diary
+from app.models.goal import Goal
+from app.models.motivation import DailyMotivation
+from app.models.preference import Preference
+from app.models.user import User
+
+__all__ = [
+    "Badge",
+    "Craving",
+    "DailyMotivation",
+    "Diary",
+    "Goal",
+    "Preference",
+    "User",
+    "user_badges",
+]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String
 from sqlalchemy.orm import relationship
 
 from app.db_config.base import Base, TimestampMixin
@@ -9,19 +9,23 @@ class Badge(TimestampMixin, Base):
     __tablename__ = "badges"
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(Text, unique=True, nullable=False)
+    name = Column(String(128), unique=True, nullable=False)
     image = Column(String, nullable=True)
-    description = Column(Text, nullable=True)
+    description = Column(String(2048), nullable=True)
     condition_time = Column(
         Integer,
-        unique=True,
         nullable=False,
         default=0,
         server_default="0",
+        index=True,
     )
 
+    # Never loaded from the badge side; user_badges rows go with the badge
+    # through the ON DELETE CASCADE foreign key
     users = relationship(
         "User",
         secondary="user_badges",
         back_populates="badges",
+        lazy="raise_on_sql",
+        passive_deletes=True,
     )
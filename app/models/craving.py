@@ -1,4 +1,14 @@
-from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    text,
+)
 from sqlalchemy.orm import relationship
 
 from app.db_config.base import Base, TimestampMixin
@@ -6,18 +16,39 @@ from app.db_config.base import Base, TimestampMixin
 
 class Craving(TimestampMixin, Base):
     __tablename__ = "cravings"
+    # Covers per-user date-range scans; the INCLUDEd counters let summary
+    # queries over recent entries run as index-only scans
+    __table_args__ = (
+        Index(
+            "ix_cravings_user_date_cov",
+            "user_id",
+            "date",
+            postgresql_include=[
+                "have_smoked",
+                "desire_range",
+                "number_of_cigarets_smoked",
+            ],
+        ),
+        # Relapse lookups only touch the (small) have_smoked subset
+        Index(
+            "ix_cravings_relapses",
+            "user_id",
+            "date",
+            postgresql_where=text("have_smoked = true"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, nullable=False)
     comments = Column(Text, nullable=False)
     have_smoked = Column(Boolean, default=False, nullable=False)
     desire_range = Column(Integer, nullable=True, default=0)
     number_of_cigarets_smoked = Column(Integer, nullable=True, default=0)
-    feeling = Column(Text, nullable=True)
-    activity = Column(Text, nullable=True)
-    company = Column(Text, nullable=True)
+    feeling = Column(String(64), nullable=True)
+    activity = Column(String(64), nullable=True)
+    company = Column(String(64), nullable=True)
 
-    user = relationship("User", back_populates="cravings")
+    user = relationship("User", back_populates="cravings", lazy="raise_on_sql")
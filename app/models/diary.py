@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Date, ForeignKey, Integer, Text
+from sqlalchemy import Boolean, Column, Date, ForeignKey, Index, Integer, Text, text
 from sqlalchemy.orm import relationship
 
 from app.db_config.base import Base, TimestampMixin
@@ -6,16 +6,37 @@ from app.db_config.base import Base, TimestampMixin
 
 class Diary(TimestampMixin, Base):
     __tablename__ = "diaries"
+    # Covers per-user date-range scans; the INCLUDEd counters let summary
+    # queries over recent entries run as index-only scans
+    __table_args__ = (
+        Index(
+            "ix_diaries_user_date_cov",
+            "user_id",
+            "date",
+            postgresql_include=[
+                "have_smoked",
+                "craving_range",
+                "number_of_cigarets_smoked",
+            ],
+        ),
+        # Relapse lookups only touch the (small) have_smoked subset
+        Index(
+            "ix_diaries_relapses",
+            "user_id",
+            "date",
+            postgresql_where=text("have_smoked = true"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, nullable=False)
     notes = Column(Text, nullable=False)
     have_smoked = Column(Boolean, default=False, nullable=False)
     craving_range = Column(Integer, nullable=True, default=0)
     number_of_cravings = Column(Integer, nullable=True, default=0)
     number_of_cigarets_smoked = Column(Integer, nullable=True, default=0)
 
-    user = relationship("User", back_populates="diaries")
+    user = relationship("User", back_populates="diaries", lazy="raise_on_sql")
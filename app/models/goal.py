@@ -1,16 +1,27 @@
-from sqlalchemy import Column, Integer, Text, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Text, Boolean, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from app.db_config.base import Base, TimestampMixin
 
 
 class Goal(TimestampMixin, Base):
     __tablename__ = "goals"
+    # Open goals per preference, e.g. for the motivation prompt
+    __table_args__ = (
+        Index(
+            "ix_goals_pref_open",
+            "preference_id",
+            postgresql_where=text("is_completed = false"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     preference_id = Column(
-        Integer, ForeignKey("preferences.id", ondelete="CASCADE"), nullable=False
+        Integer,
+        ForeignKey("preferences.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
     )
     description = Column(Text, nullable=False)
     is_completed = Column(Boolean, default=False, nullable=False)
 
-    preference = relationship("Preference", back_populates="goals")
+    preference = relationship("Preference", back_populates="goals", lazy="raise_on_sql")
@@ -1,23 +1,50 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer, Text
-from sqlalchemy.orm import relationship
+from typing import Optional
+
+from sqlalchemy import Column, Date, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import deferred, relationship
 
 from app.db_config.base import Base, TimestampMixin
 
 
 class DailyMotivation(TimestampMixin, Base):
     __tablename__ = "daily_motivations"
+    # one motivation per user per day; also serves the (user_id, date) lookups
+    __table_args__ = (
+        UniqueConstraint("user_id", "date", name="uq_daily_motivations_user_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, nullable=False)
+
+    # The generated motivation exactly as the model returned it: progress,
+    # motivation, cravings, ideas and (optionally) recommendations.
+    # Deferred so id/date-only queries don't ship the text; queries that
+    # serialize it must undefer() it, anything else raises instead of
+    # silently lazy-loading.
+    payload = deferred(Column(JSONB, nullable=False), raiseload=True)
+
+    user = relationship("User", back_populates="daily_motivations", lazy="raise_on_sql")
+
+    @property
+    def progress(self) -> str:
+        return self.payload["progress"]
+
+    @property
+    def motivation(self) -> str:
+        return self.payload["motivation"]
+
+    @property
+    def cravings(self) -> str:
+        return self.payload["cravings"]
 
-    progress = Column(Text, nullable=False)
-    motivation = Column(Text, nullable=False)
-    cravings = Column(Text, nullable=False)
-    ideas = Column(Text, nullable=False)
-    recommendations = Column(Text, nullable=True)
+    @property
+    def ideas(self) -> str:
+        return self.payload["ideas"]
 
-    user = relationship("User", back_populates="daily_motivations")
-    user = relationship("User", back_populates="daily_motivations")
+    @property
+    def recommendations(self) -> Optional[str]:
+        return self.payload.get("recommendations")
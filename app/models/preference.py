@@ -1,4 +1,8 @@
-from sqlalchemy import Column, Date, ForeignKey, Integer, Text
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import CheckConstraint, Column, Date, ForeignKey, Integer, String, func
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 
 from app.db_config.base import Base, TimestampMixin
@@ -7,31 +11,64 @@ from app.models.goal import Goal
 
 class Preference(TimestampMixin, Base):
     __tablename__ = "preferences"
+    __table_args__ = (
+        CheckConstraint("cig_price_cents >= 0", name="ck_preferences_cig_price_cents"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), unique=True, nullable=False
     )
-    reason = Column(Text, nullable=False)
+    reason = Column(String(2048), nullable=False)
     quit_date = Column(Date, nullable=False)
-    language = Column(Text, nullable=True, default="en-us")
+    language = Column(String(128), nullable=True, default="en-us")
     cig_per_day = Column(Integer, nullable=True, default=0)
     years_smoking = Column(Integer, nullable=True, default=0)
-    cig_price = Column(
+    cig_price_cents = Column(
         Integer,
-        nullable=True,
+        nullable=False,
         default=0,
-        comment="Price per cigarette in local currency",
+        server_default="0",
+        comment="Price per cigarette in cents of the local currency",
     )
 
+    # API and prompts work in currency units; storage is exact integer cents
+    @hybrid_property
+    def cig_price(self) -> float:
+        return (self.cig_price_cents or 0) / 100
+
+    @cig_price.inplace.setter
+    def _cig_price_setter(self, value: Optional[float]) -> None:
+        self.cig_price_cents = round((value or 0) * 100)
+
+    @cig_price.inplace.expression
+    @classmethod
+    def _cig_price_expression(cls):
+        return cls.cig_price_cents / 100.0
+
+    # CURRENT_DATE is not immutable, so Postgres can't store this as a
+    # generated column; the hybrid gives the same value in Python and in SQL
+    @hybrid_property
+    def days_smoke_free(self) -> int:
+        return (date.today() - self.quit_date).days
+
+    @days_smoke_free.inplace.expression
+    @classmethod
+    def _days_smoke_free_expression(cls):
+        return func.current_date() - cls.quit_date
+
+    # goals are serialized with every PreferenceOut, so load them up front
     goals = relationship(
         Goal,
         back_populates="preference",
         cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
     )
 
     user = relationship(
         "User",
         back_populates="preference",
         uselist=False,
+        lazy="raise_on_sql",
     )
@@ -20,21 +20,42 @@ class User(Base):
     surname = Column(String, nullable=True)
     img = Column(String, nullable=True)
 
+    # Loaded explicitly with selectinload() where a route needs it
     preference = relationship(
         Preference,
         back_populates="user",
         uselist=False,
+        lazy="select",
     )
+    # Listings page through these with explicit queries; never iterate the
+    # ORM collections, which would pull every row for the user. Deleting a
+    # user leaves the child rows to the FKs' ON DELETE CASCADE.
     daily_motivations = relationship(
-        DailyMotivation, back_populates="user", cascade="all, delete-orphan"
+        DailyMotivation,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
     cravings = relationship(
-        Craving, back_populates="user", cascade="all, delete-orphan"
+        Craving,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
+    )
+    diaries = relationship(
+        Diary,
+        back_populates="user",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="raise",
     )
-    diaries = relationship(Diary, back_populates="user", cascade="all, delete-orphan")
 
     badges = relationship(
         "Badge",
         secondary="user_badges",
         back_populates="users",
+        passive_deletes=True,
+        lazy="raise_on_sql",
     )
@@ -1,3 +1,5 @@
+from app.core.config import settings
+
 STRICT_REFUSAL_MSG = (
   "I'm sorry, but I can only help with smoking cessation and tobacco-related questions. "
   "I cannot answer questions about other topics. Is there anything about quitting smoking "
@@ -72,7 +74,26 @@ TOOL RULES (never expose tool names):
 ON FAILURE: If a tool errors, say you attempted it, summarize the failure briefly, and offer a next step.
 """
 
+# Only included when TOOL_OUTPUT_FORMAT=json
+TOOLS_JSON_SPEC = """
+TOOL OUTPUT: Calculator and research results arrive as compact JSON objects. Explain them in plain
+language; never paste raw JSON to the user.
+"""
+
 RESPONSE_TEMPLATES = {
   "refusal": STRICT_REFUSAL_MSG,
   "med_redirect": "For medication selection or dosing, please discuss options, safety, and monitoring with your clinician."
 }
+
+# Everything in the system message that does not depend on the user, joined
+# once. It always leads the system message so the provider's automatic
+# prompt-prefix caching can reuse it across requests.
+SYSTEM_PROMPT_PREFIX = "\n\n".join(
+  [
+    SYSTEM_POLICY.strip(),
+    DEVELOPER_POLICY.strip(),
+    f"\nRefusal message (use verbatim when refusing):\n{STRICT_REFUSAL_MSG.strip()}",
+    TOOLS_SPEC.strip(),
+    *([TOOLS_JSON_SPEC.strip()] if settings.tool_output_format == "json" else []),
+  ]
+)
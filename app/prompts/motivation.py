@@ -1,49 +1,26 @@
-def get_motivation_prompt(
-    progress_intro: str,
-    reason: str,
-    goal_texts: list[str],
-    days_smoke_free: int,
-    language: str,
-) -> str:
-    """
-    Build the GPT prompt for daily detailed motivation.
+_DAY_ZERO_PROGRESS = (
+    "Your quit date is today; there are no measurable health "
+    "improvements yet, but this marks the very first step toward "
+    "long-term well-being."
+)
 
-    Args:
-        progress_intro: default progress text for days > 0
-        reason: user's quit-smoking reason
-        goal_texts: list of goal descriptions
-        days_smoke_free: number of days since quit_date (can be 0 or negative)
-    """
-    # 1) Handle day-0 case
-    if days_smoke_free == 0:
-        progress_section = (
-            "Your quit date is today; there are no measurable health "
-            "improvements yet, but this marks the very first step toward "
-            "long-term well-being."
-        )
-    else:
-        progress_section = progress_intro
-
-    # 2) JSON template (escaped braces)
-    template = (
-        '{{"progress": "...", "motivation": "...", '
-        '"cravings": "...", "ideas": "...", "recommendations": "..."}}'
-    )
+# Fixed instructions, sent as the system message. They are byte-identical for
+# every user and every day, so OpenAI's automatic prompt caching can reuse them
+# as a prefix; everything user-specific lives in the user message below.
+MOTIVATION_SYSTEM_PROMPT = """
+You are a caring, evidence-based smoking-cessation coach. Produce a JSON object with exactly these keys:
+progress, motivation, cravings, ideas, recommendations. Write it in the language given in the user context.
 
-    # 3) Full prompt
-    prompt = f"""
-You are an expert smoking-cessation coach. Produce a JSON object with exactly these keys:
-progress, motivation, cravings, ideas, recommendations. It should be in the language {language}.
+{"progress": "...", "motivation": "...", "cravings": "...", "ideas": "...", "recommendations": "..."}
 
-{template}
-
-1. progress: {progress_section}
+1. progress: Build on the progress note from the user context. If the note says {days}
+   instead of a number of days, write {days} verbatim wherever you refer to that number.
    Cite at least *two* different recent (past 6 months) peer-reviewed medical publications
    or authoritative health sources (e.g. 'Smith et al., Journal of Respiratory Medicine, March 2025',
    'HealthOrg April 2025').
 
-2. motivation: A heartfelt, personalized encouragement based on the user's reason (“{reason}”)
-   and goals ({', '.join(goal_texts)}). Cite at least *two* recent psychology studies
+2. motivation: A heartfelt, personalized encouragement based on the user's reason
+   and goals from the user context. Cite at least *two* recent psychology studies
    or expert articles (e.g. 'Zheng et al., Journal of Smoking Cessation, Nov 2024',
    'PsychHealth May 2025'). Make it long.
 
@@ -56,4 +33,46 @@ progress, motivation, cravings, ideas, recommendations. It should be in the lang
 
 Return only valid JSON—no extra explanation or text.
 """
-    return prompt
+
+# System prompt for one request covering several users: same instructions,
+# one result per user. Also static, so it caches like the single-user one.
+MOTIVATION_GROUP_SYSTEM_PROMPT = (
+    MOTIVATION_SYSTEM_PROMPT
+    + """
+The user context below describes several users, each starting with its id.
+Return {"results": [...]} with one object per user: the user's id plus the
+keys above, each written for that user alone, in that user's language.
+"""
+)
+
+_USER_CONTEXT_TEMPLATE = """---USER CONTEXT---
+Language: {language}
+Progress note: {progress}
+Reason for quitting: “{reason}”
+Goals: {goals}
+"""
+
+
+def get_motivation_prompt(
+    progress_intro: str,
+    reason: str,
+    goal_texts: list[str],
+    days_smoke_free: int,
+    language: str,
+) -> str:
+    """
+    Build the user message for daily detailed motivation; the instructions
+    are in MOTIVATION_SYSTEM_PROMPT.
+
+    Args:
+        progress_intro: default progress text for days > 0
+        reason: user's quit-smoking reason
+        goal_texts: list of goal descriptions
+        days_smoke_free: number of days since quit_date (can be 0 or negative)
+    """
+    return _USER_CONTEXT_TEMPLATE.format(
+        language=language,
+        progress=_DAY_ZERO_PROGRESS if days_smoke_free == 0 else progress_intro,
+        reason=reason,
+        goals=", ".join(goal_texts),
+    )
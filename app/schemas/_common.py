@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, ConfigDict
+
+__all__ = [
+    "ORMOut",
+]
+
+
+class ORMOut(BaseModel):
+    """Base for read-only response schemas that are filled from ORM rows."""
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    @classmethod
+    def from_orm_fast(cls, obj: Any):
+        """
+        Build the schema from `obj`'s attributes without validating them.
+
+        Only for rows read back from our own database, whose values already
+        satisfied the column types on the way in.
+        """
+        return cls.model_construct(
+            **{name: getattr(obj, name) for name in cls.model_fields}
+        )
@@ -0,0 +1,7 @@
+from typing import Annotated
+
+from pydantic import EmailStr, Field
+
+# Single email type for every schema that accepts or returns an address.
+# 320 is the RFC 5321 limit, checked before the email-validator call.
+Email = Annotated[EmailStr, Field(max_length=320)]
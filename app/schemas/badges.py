@@ -1,7 +1,20 @@
+from __future__ import annotations
+
 from datetime import datetime
-from typing import List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+__all__ = [
+    "BadgesOut",
+    "BadgeOut",
+    "BadgesIn",
+    "BadgesUpdate",
+    "BadgesDelete",
+    "BadgesListOut",
+    "UserBadgeBase",
+    "UserBadgeCreate",
+    "UserBadgeResponse",
+]
 
 
 class BadgesOut(BaseModel):
@@ -13,43 +26,49 @@ class BadgesOut(BaseModel):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
-class BadgesIn(BaseModel):
+class BadgeOut(BaseModel):
+    """Compact, read-only badge nested in PreferenceOut."""
+
+    id: int
     name: str
-    description: str
+    image: str | None = None
+    description: str | None = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+class BadgesIn(BaseModel):
+    name: str = Field(..., max_length=128)
+    description: str = Field(..., max_length=2048)
     image: str
     condition_time: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BadgesUpdate(BaseModel):
-    name: Optional[str] = None
-    description: Optional[str] = None
-    image: Optional[str] = None
-    condition_time: Optional[int] = None
+    name: str | None = Field(None, max_length=128)
+    description: str | None = Field(None, max_length=2048)
+    image: str | None = None
+    condition_time: int | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class BadgesDelete(BaseModel):
     id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class BadgesListOut(BaseModel):
-    badges: List[BadgesOut]
+    badges: list[BadgesOut]
     total: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserBadgeBase(BaseModel):
@@ -66,5 +85,4 @@ class UserBadgeCreate(UserBadgeBase):
 class UserBadgeResponse(UserBadgeBase):
     """Response schema for a user-badge assignment."""
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,5 +1,11 @@
+from __future__ import annotations
+
 from pydantic import BaseModel
-from typing import Optional
+
+__all__ = [
+    "ChatIn",
+    "ThreadOut",
+]
 
 
 class ChatIn(BaseModel):
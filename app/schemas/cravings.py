@@ -1,51 +1,56 @@
+from __future__ import annotations
+
 from datetime import date
-from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas._common import ORMOut
 
+__all__ = [
+    "CravingOut",
+    "CravingIn",
+    "CravingUpdate",
+    "CravingListOut",
+]
 
-class CravingOut(BaseModel):
+
+class CravingOut(ORMOut):
     id: int
     date: date
     comments: str
     have_smoked: bool
-    desire_range: Optional[int] = 0
-    number_of_cigarets_smoked: Optional[int] = 0
-    feeling: Optional[str] = None
-    activity: Optional[str] = None
-    company: Optional[str] = None
+    desire_range: int | None = 0
+    number_of_cigarets_smoked: int | None = 0
+    feeling: str | None = None
+    activity: str | None = None
+    company: str | None = None
 
-    class Config:
-        from_attributes = True
 
 class CravingIn(BaseModel):
     date: date
-    comments: str
+    comments: str = Field(..., max_length=2000)
     have_smoked: bool
-    desire_range: Optional[int] = 0
-    number_of_cigarets_smoked: Optional[int] = 0
-    feeling: Optional[str] = None
-    activity: Optional[str] = None
-    company: Optional[str] = None
+    desire_range: int = 0
+    number_of_cigarets_smoked: int = 0
+    feeling: str | None = Field(None, max_length=64)
+    activity: str | None = Field(None, max_length=64)
+    company: str | None = Field(None, max_length=64)
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class CravingUpdate(BaseModel):
-    comments: Optional[str] = None
-    have_smoked: Optional[bool] = None
-    desire_range: Optional[int] = None
-    number_of_cigarets_smoked: Optional[int] = None
-    feeling: Optional[str] = None
-    activity: Optional[str] = None
-    company: Optional[str] = None
+    comments: str | None = Field(None, max_length=2000)
+    have_smoked: bool | None = None
+    desire_range: int | None = None
+    number_of_cigarets_smoked: int | None = None
+    feeling: str | None = Field(None, max_length=64)
+    activity: str | None = Field(None, max_length=64)
+    company: str | None = Field(None, max_length=64)
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 class CravingListOut(BaseModel):
     cravings: list[CravingOut]
     total: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
@@ -1,48 +1,57 @@
+from __future__ import annotations
+
 from datetime import date
-from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+from app.schemas._common import ORMOut
+
+__all__ = [
+    "DiaryOut",
+    "DiaryIn",
+    "DiaryUpdate",
+    "DiaryListOut",
+    "DIARY_LIST_ADAPTER",
+]
 
 
-class DiaryOut(BaseModel):
+class DiaryOut(ORMOut):
     id: int
     date: date
     notes: str
     have_smoked: bool
-    craving_range: Optional[int] = None
-    number_of_cravings: Optional[int] = None
-    number_of_cigarets_smoked: Optional[int] = None
+    craving_range: int | None = None
+    number_of_cravings: int | None = None
+    number_of_cigarets_smoked: int | None = None
 
-    class Config:
-        from_attributes = True
+
+# Built once at import and reused by the list routes to serialize rows
+DIARY_LIST_ADAPTER = TypeAdapter(list[DiaryOut])
 
 
 class DiaryIn(BaseModel):
     date: date
-    notes: str
+    notes: str = Field(..., max_length=2000)
     have_smoked: bool
-    craving_range: Optional[int] = None
-    number_of_cravings: Optional[int] = None
-    number_of_cigarets_smoked: Optional[int] = None
+    craving_range: int | None = None
+    number_of_cravings: int | None = None
+    number_of_cigarets_smoked: int | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class DiaryUpdate(BaseModel):
-    notes: Optional[str] = None
-    have_smoked: Optional[bool] = None
-    craving_range: Optional[int] = None
-    number_of_cravings: Optional[int] = None
-    number_of_cigarets_smoked: Optional[int] = None
+    notes: str | None = Field(None, max_length=2000)
+    have_smoked: bool | None = None
+    craving_range: int | None = None
+    number_of_cravings: int | None = None
+    number_of_cigarets_smoked: int | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class DiaryListOut(BaseModel):
     diaries: list[DiaryOut]
     total: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
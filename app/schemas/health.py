@@ -1,9 +1,16 @@
 from datetime import date
 
-from pydantic import BaseModel
+from pydantic.dataclasses import dataclass
 
+__all__ = [
+    "HealthOut",
+]
 
-class HealthOut(BaseModel):
+
+# A slotted dataclass: fifteen ints don't need BaseModel's per-instance
+# bookkeeping, and orjson serializes dataclasses natively
+@dataclass(slots=True, frozen=True)
+class HealthOut:
     """HealthOut schema for health-related data.
     This schema is used to represent health metrics and improvements over time.
     It includes various health indicators that can be tracked daily.
@@ -40,6 +47,3 @@ class HealthOut(BaseModel):
     decreased_risk_of_lung_cancer: int
     decreased_risk_of_heart_attack: int
     life_regained_in_hours: int
-
-    class Config:
-        from_attributes = True
@@ -1,6 +1,14 @@
+from __future__ import annotations
+
 from datetime import date, datetime
-from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, TypeAdapter
+
+__all__ = [
+    "DetailedMotivationOut",
+    "DailyMotivationCreate",
+    "DailyMotivationOut",
+    "MOTIVATION_LIST_ADAPTER",
+]
 
 
 class DetailedMotivationOut(BaseModel):
@@ -8,10 +16,9 @@ class DetailedMotivationOut(BaseModel):
     motivation: str
     cravings: str
     ideas: str
-    recommendations: Optional[str] = None
+    recommendations: str | None = None
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 class DailyMotivationCreate(BaseModel):
@@ -20,7 +27,7 @@ class DailyMotivationCreate(BaseModel):
     motivation: str
     cravings: str
     ideas: str
-    recommendations: Optional[str] = None
+    recommendations: str | None = None
 
 
 class DailyMotivationOut(DailyMotivationCreate):
@@ -29,5 +36,8 @@ class DailyMotivationOut(DailyMotivationCreate):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+# Built once at import and reused by the motivation feed
+MOTIVATION_LIST_ADAPTER = TypeAdapter(list[DailyMotivationOut])
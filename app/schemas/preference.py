@@ -1,97 +1,104 @@
+from __future__ import annotations
+
 from datetime import date, datetime
-from typing import List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+
+from app.schemas.badges import BadgeOut
+
+__all__ = [
+    "GoalBase",
+    "GoalCreate",
+    "GoalUpdate",
+    "GoalOut",
+    "PreferenceBase",
+    "PreferenceCreate",
+    "PreferenceUpdate",
+    "PreferenceOut",
+]
 
 
 # ---- Goal schemas ----
 class GoalBase(BaseModel):
-    description: str = Field(..., example="Run 5km instead of smoking break")
-    is_completed: bool = Field(False, example=False)
+    description: str = Field(..., examples=["Run 5km instead of smoking break"])
+    is_completed: bool = Field(False, examples=[False])
 
 
 class GoalCreate(GoalBase):
     """Incoming payload for creating a goal."""
 
-    pass
+    # Bounded on input only: goals.description is TEXT, so GoalOut must
+    # still accept whatever is already stored
+    description: str = Field(
+        ..., max_length=2000, examples=["Run 5km instead of smoking break"]
+    )
 
 
 class GoalUpdate(BaseModel):
-    id: Optional[int] = Field(
+    id: int | None = Field(
         None,
         description="If omitted, a new goal will be created; if provided, the existing goal will be updated",
     )
-    description: Optional[str] = Field(
-        None, example="Take a smoke-free walk instead of a break"
+    description: str | None = Field(
+        None, max_length=2000, examples=["Take a smoke-free walk instead of a break"]
     )
-    is_completed: Optional[bool] = Field(None, example=True)
+    is_completed: bool | None = Field(None, examples=[True])
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class GoalOut(GoalBase):
     id: int
     preference_id: int
 
-    class Config:
-        from_attributes = True
-
-
-# ---- Badge schemas (read-only) ----
-class BadgeOut(BaseModel):
-    id: int
-    name: str
-    image: Optional[str] = None
-    description: Optional[str] = None
-
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # ---- Preference schemas ----
 class PreferenceBase(BaseModel):
-    reason: str = Field(..., example="Protect my health")
-    quit_date: date = Field(..., example="2025-07-08")
-    language: Optional[str] = Field(..., example="en-us")
-    cig_per_day: Optional[int] = Field(0, example=10)
-    years_smoking: Optional[int] = Field(0, example=5)
-    cig_price: Optional[float] = Field(
-        0.0, example=5.0, description="Price per cigarette in local currency"
+    reason: str = Field(..., max_length=2048, examples=["Protect my health"])
+    quit_date: date = Field(..., examples=["2025-07-08"])
+    language: str | None = Field(..., max_length=128, examples=["en-us"])
+    cig_per_day: int | None = Field(0, examples=[10])
+    years_smoking: int | None = Field(0, examples=[5])
+    cig_price: float = Field(
+        0.0, examples=[5.0], description="Price per cigarette in local currency"
     )
 
 
 class PreferenceCreate(PreferenceBase):
     """Payload for creating a Preference; you can supply a list of initial goals."""
 
-    goals: List[GoalCreate] = Field(default_factory=list)
+    goals: list[GoalCreate] = Field(default_factory=list)
 
 
 class PreferenceUpdate(BaseModel):
-    reason: Optional[str] = Field(None, example="Save money for a vacation")
-    quit_date: Optional[date] = Field(None, example="2025-08-01")
-    language: Optional[str] = Field(None, example="en-us")
-    cig_per_day: Optional[int] = Field(None, example=5)
-    years_smoking: Optional[int] = Field(None, example=3)
-    cig_price: Optional[float] = Field(
-        None, example=4.5, description="Price per cigarette in local currency"
+    reason: str | None = Field(
+        None, max_length=2048, examples=["Save money for a vacation"]
+    )
+    quit_date: date | None = Field(None, examples=["2025-08-01"])
+    language: str | None = Field(None, max_length=128, examples=["en-us"])
+    cig_per_day: int | None = Field(None, examples=[5])
+    years_smoking: int | None = Field(None, examples=[3])
+    cig_price: float | None = Field(
+        None, examples=[4.5], description="Price per cigarette in local currency"
     )
 
-    goals: Optional[List[GoalUpdate]] = Field(
+    goals: list[GoalUpdate] | None = Field(
         None,
         description="List of goals to add/update; existing goals matched by `id`, new goals when `id` is absent",
     )
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
 
 
 class PreferenceOut(PreferenceBase):
     id: int
-    goals: List[GoalOut] = []
-    badges: List[BadgeOut] = []
+    goals: list[GoalOut] = Field(default_factory=list)
+    badges: list[BadgeOut] = Field(default_factory=list)
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    # Built on first use; GoalOut and BadgeOut are shared classes, so their
+    # core schemas are reused inside this one rather than rebuilt inline
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
@@ -2,7 +2,16 @@
 Pydantic schema for returning JWT access tokens.
 """
 
-from pydantic import BaseModel, EmailStr, Field
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from app.schemas._types import Email
+
+__all__ = [
+    "Token",
+    "LoginIn",
+]
 
 
 class Token(BaseModel):
@@ -23,5 +32,5 @@ class Token(BaseModel):
 class LoginIn(BaseModel):
     """Schema for user login input."""
 
-    email: EmailStr
+    email: Email
     password: str
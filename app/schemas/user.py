@@ -1,24 +1,30 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from __future__ import annotations
+
+from pydantic import BaseModel, ConfigDict
+
+from app.schemas._types import Email
+
+__all__ = [
+    "UserOut",
+    "UserUpdate",
+]
 
 
 class UserOut(BaseModel):
     id: int
     auth0_id: str
-    email: EmailStr
-    name: Optional[str]
-    surname: Optional[str]
-    img: Optional[str]
+    email: Email
+    name: str | None
+    surname: str | None
+    img: str | None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserUpdate(BaseModel):
-    email: Optional[EmailStr] = None
-    name: Optional[str] = None
-    surname: Optional[str] = None
-    img: Optional[str] = None
+    email: Email | None = None
+    name: str | None = None
+    surname: str | None = None
+    img: str | None = None
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True, defer_build=True)
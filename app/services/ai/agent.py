@@ -1,5 +1,6 @@
 import logging
 import os
+from contextlib import AsyncExitStack
 from typing import Optional
 
 from langchain.chat_models import init_chat_model
@@ -8,7 +9,7 @@ from langchain_core.language_models import BaseChatModel
 from app.core.config import settings
 from app.prompts.chat import SYSTEM_POLICY
 from app.services.ai.checkpointer import build_checkpointer
-from app.services.ai.tools import TOOLS
+from app.services.ai.tools import get_tools
 
 logger = logging.getLogger(__name__)
 
@@ -33,10 +34,10 @@ def create_chat_model() -> BaseChatModel:
     return model
 
 
-def _safe_build_checkpointer():
+async def _safe_build_checkpointer(stack: AsyncExitStack):
     """Try to build persistent checkpointer; fall back to None on failure."""
     try:
-        return build_checkpointer()
+        return await build_checkpointer(stack)
     except Exception as e:
         logger.warning(
             "Checkpointer setup failed; continuing without persistence. Error: %s", e
@@ -44,29 +45,27 @@ def _safe_build_checkpointer():
         return None
 
 
-def create_agent() -> Optional[object]:
-    """Create the custom LangGraph agent (only)."""
+async def create_agent(stack: AsyncExitStack) -> Optional[object]:
+    """
+    Create the custom LangGraph agent (only).
+
+    Called from the app lifespan: the async checkpointer's connections are
+    bound to the running event loop and are released when `stack` exits.
+    """
     try:
         logger.info("Creating chat model...")
         model = create_chat_model()
 
         logger.info("Building checkpointer...")
-        checkpointer = _safe_build_checkpointer()
+        checkpointer = await _safe_build_checkpointer(stack)
 
         logger.info("Creating custom LangGraph agent...")
-        agent = create_custom_agent(model, TOOLS, checkpointer)
+        agent = create_custom_agent(model, get_tools(), checkpointer)
         logger.info("Custom agent created successfully")
         return agent
 
     except Exception as e:
-        logger.error(f"Failed to create custom agent: {e}")
+        logger.error("Failed to create custom agent: %s", e)
         logger.exception("Full traceback:")
+        logger.warning("Custom agent initialization failed - chat functionality will be disabled")
         return None
-
-
-# Singleton agent with persisted memory (module scope)
-agent = create_agent()
-
-if agent is None:
-    logger.warning("Custom agent initialization failed - chat functionality will be disabled")
-
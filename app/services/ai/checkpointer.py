@@ -1,30 +1,44 @@
+from contextlib import AsyncExitStack
 from pathlib import Path
 from typing import Optional
 
-from langgraph.checkpoint.postgres import PostgresSaver
-from langgraph.checkpoint.sqlite import SqliteSaver
-from psycopg_pool import ConnectionPool
+import aiosqlite
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from psycopg_pool import AsyncConnectionPool
 
 from app.core.config import settings
 
 
-def build_checkpointer() -> Optional[object]:
+async def build_checkpointer(stack: AsyncExitStack) -> Optional[BaseCheckpointSaver]:
+    """
+    Build an async checkpointer; its connections are closed when `stack` exits.
+
+    Must run inside the event loop that will use it (the app lifespan).
+    """
     # 1) Prefer Postgres (shared across replicas)
+    pool = AsyncConnectionPool(
+        conninfo=settings.langgraph_database_url,
+        kwargs={"autocommit": True},
+        open=False,
+    )
     try:
-        pool = ConnectionPool(conninfo=settings.langgraph_database_url, kwargs={"autocommit": True})
-        cp = PostgresSaver(pool)
-        if hasattr(cp, "setup"):
-            cp.setup()
+        await pool.open()
+        cp = AsyncPostgresSaver(pool)
+        await cp.setup()
+        stack.push_async_callback(pool.close)
         return cp
     except Exception:
-        pass
+        await pool.close()
 
     # 2) Fallback to local SQLite (single-process persistence)
     try:
         sqlite_path = Path(".langgraph.sqlite").resolve()
-        cp = SqliteSaver.from_conn_string(f"sqlite:///{sqlite_path}")
-        if hasattr(cp, "setup"):
-            cp.setup()
+        conn = await aiosqlite.connect(sqlite_path)
+        stack.push_async_callback(conn.close)
+        cp = AsyncSqliteSaver(conn)
+        await cp.setup()
         return cp
     except Exception:
-        return None
\ No newline at end of file
+        return None
@@ -4,10 +4,14 @@ This provides more control over the agent's behavior and better integration with
 """
 
 import logging
+from functools import lru_cache
+from io import StringIO
 from typing import Any, Dict, List, Optional, TypedDict
 from datetime import date
 from typing_extensions import Annotated
 
+import orjson
+
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
 from langchain_core.tools import BaseTool
@@ -16,10 +20,45 @@ from langgraph.prebuilt import ToolNode
 from langgraph.graph.message import add_messages
 
 from app.core.config import settings
-from app.prompts.chat import SYSTEM_POLICY, DEVELOPER_POLICY, STRICT_REFUSAL_MSG, RESPONSE_TEMPLATES, TOOLS_SPEC
+from app.prompts.chat import SYSTEM_PROMPT_PREFIX
 
 logger = logging.getLogger(__name__)
 
+# Distinct user contexts whose system prompt is kept per agent node
+SYSTEM_MESSAGE_CACHE_SIZE = 256
+
+# Milestone notes keyed by days smoke-free: plain text for the model's
+# context, and the user-facing variants returned by get_milestone_message
+_CONTEXT_MILESTONES = {
+    1: "First day smoke-free! Your body is already healing.",
+    7: "One week! The worst of withdrawal is behind you.",
+    30: "One month! Your lung function is improving.",
+    90: "Three months! Your risk of heart disease is decreasing.",
+    365: "One year! Your risk of heart disease is half that of a smoker.",
+}
+_MILESTONE_MESSAGES = {
+    1: "🎉 First day smoke-free! Your body is already healing.",
+    7: "🌟 One week! The worst of withdrawal is behind you.",
+    30: "🏆 One month! Your lung function is improving.",
+    90: "💪 Three months! Your risk of heart disease is decreasing.",
+    365: "🎊 One year! Your risk of heart disease is half that of a smoker.",
+}
+
+# State channels holding the user's data, as filled in by the chat router
+_USER_CONTEXT_FIELDS = (
+    "user_id",
+    "quit_date",
+    "days_since_quit",
+    "quit_reason",
+    "cigarettes_per_day",
+    "years_smoking",
+    "cigarette_price",
+    "language",
+    "goals",
+    "recent_cravings",
+    "recent_diary_entries",
+)
+
 # State definition
 class AgentState(TypedDict):
     messages: Annotated[List[BaseMessage], add_messages]
@@ -80,70 +119,36 @@ def create_custom_agent(
 def create_context_node():
     """Create a node that enriches the conversation with user context."""
     
-    def context_node(state: AgentState) -> AgentState:
-        # Initialize conversation context if not present
-        if "conversation_context" not in state:
-            state["conversation_context"] = {}
-        
-        # Add user context to conversation
-        context = state["conversation_context"]
-        
-        # Debug log the incoming state
-        logger.info(f"Context node received state keys: {list(state.keys())}")
+    async def context_node(state: AgentState) -> Dict[str, Any]:
         if state.get("user_id"):
-            logger.info(f"Processing context for user {state['user_id']}")
-        
-        # CRITICAL: Always update context with fresh state data to maintain context across conversation
-        # This ensures that even after multiple message exchanges, we retain the user's detailed context
-        
-        logger.info(f"Context enricher: state has keys: {list(state.keys())}")
-        
-        # FORCE UPDATE: Always refresh conversation context with current state data
-        user_fields = ["user_id", "quit_date", "days_since_quit", "quit_reason", "cigarettes_per_day", 
-                      "years_smoking", "cigarette_price", "language"]
-        
-        for field in user_fields:
-            if state.get(field) is not None:
-                context[field] = state[field]
-                logger.info(f"Updated context[{field}] = {state[field]}")
-        
-        # FORCE UPDATE: Complex data structures - always preserve if available
-        if state.get("goals"):
-            context["goals"] = state["goals"]
-            logger.info(f"Updated context[goals] with {len(state['goals'])} goals")
-            
-        if state.get("recent_cravings"):
-            context["recent_cravings"] = state["recent_cravings"]
-            logger.info(f"CRITICAL: Updated context[recent_cravings] with {len(state['recent_cravings'])} cravings")
-            
-        if state.get("recent_diary_entries"):
-            context["recent_diary_entries"] = state["recent_diary_entries"]
-            logger.info(f"Updated context[recent_diary_entries] with {len(state['recent_diary_entries'])} entries")
-        
-        # Log final context state
-        logger.info(f"Final conversation_context keys: {list(context.keys())}")
-        if context.get("recent_cravings"):
-            logger.info(f"Final check: context has {len(context['recent_cravings'])} cravings")
-        
+            logger.debug("Processing context for user %s", state["user_id"])
+
+        # The user's data already lives in its own state channels, which the
+        # agent node reads directly; only derived fields are kept here.
+        context: Dict[str, Any] = {}
+        update: Dict[str, Any] = {"current_step": "context_enriched"}
+
+        # The router sends days_since_quit with the quit date; derive it once
+        # here for callers that only pass the date, so nothing re-parses it
+        days = state.get("days_since_quit")
+        if days is None and (quit_date := state.get("quit_date")):
+            try:
+                days = (date.today() - date.fromisoformat(quit_date)).days
+            except (TypeError, ValueError):
+                logger.debug("Ignoring unparseable quit_date %r", quit_date)
+            else:
+                update["days_since_quit"] = days
+
         # Add motivational context based on quit duration
-        days = state.get("days_since_quit", 0)
-        if days > 0:
-            if days == 1:
-                context["milestone"] = "First day smoke-free! Your body is already healing."
-            elif days == 7:
-                context["milestone"] = "One week! The worst of withdrawal is behind you."
-            elif days == 30:
-                context["milestone"] = "One month! Your lung function is improving."
-            elif days == 90:
-                context["milestone"] = "Three months! Your risk of heart disease is decreasing."
-            elif days == 365:
-                context["milestone"] = "One year! Your risk of heart disease is half that of a smoker."
-        
-        return {
-            **state,
-            "current_step": "context_enriched",
-            "conversation_context": context
-        }
+        milestone = _CONTEXT_MILESTONES.get(days)
+        if milestone:
+            context["milestone"] = milestone
+
+        # Nodes return only the channels they changed; on most turns the
+        # derived context is the same as last turn's and is not rewritten
+        if context != state.get("conversation_context"):
+            update["conversation_context"] = context
+        return update
     
     return context_node
 
@@ -162,7 +167,7 @@ def _build_quit_info_context(context: Dict[str, Any]) -> List[str]:
         "milestone": "Milestone"
     }
     
-    return [f"{label}: {context[key]}" for key, label in quit_info_mapping.items() if context.get(key)]
+    return [f"{label}: {value}" for key, label in quit_info_mapping.items() if (value := context.get(key))]
 
 
 def _build_smoking_history_context(context: Dict[str, Any]) -> List[str]:
@@ -173,7 +178,7 @@ def _build_smoking_history_context(context: Dict[str, Any]) -> List[str]:
         "cigarette_price": lambda x: f"Cigarette Cost: {x} per cigarette"
     }
     
-    return [formatter(context[key]) for key, formatter in smoking_history_mapping.items() if context.get(key)]
+    return [formatter(value) for key, formatter in smoking_history_mapping.items() if (value := context.get(key))]
 
 
 def _build_preferences_context(context: Dict[str, Any]) -> List[str]:
@@ -182,7 +187,7 @@ def _build_preferences_context(context: Dict[str, Any]) -> List[str]:
         "language": "Preferred Language"
     }
     
-    return [f"{label}: {context[key]}" for key, label in preferences_mapping.items() if context.get(key)]
+    return [f"{label}: {value}" for key, label in preferences_mapping.items() if (value := context.get(key))]
 
 
 def _build_goals_context(context: Dict[str, Any]) -> List[str]:
@@ -201,24 +206,28 @@ def _build_goals_context(context: Dict[str, Any]) -> List[str]:
     return goal_parts
 
 
+# Optional craving fields appended to an episode line, in display order
+_CRAVING_DETAIL_FIELDS = (
+    ("feeling", ", felt {}"),
+    ("activity", ", during {}"),
+    ("company", ", with {}"),
+)
+
+
 def _format_craving_episode(craving: Dict[str, Any], episode_num: int) -> str:
     """Format a single craving episode into a readable string."""
     # Base episode info
     details = f"Episode {episode_num}: {craving.get('date', 'Unknown')}, Intensity {craving.get('desire_range', 0)}/10"
     
-    # Optional context fields
-    context_fields = [
-        ("feeling", lambda x: f", felt {x}"),
-        ("activity", lambda x: f", during {x}"),
-        ("company", lambda x: f", with {x}"),
-        ("comments", lambda x: f", notes: '{x[:40]}{'...' if len(x) > 40 else ''}'"),
-    ]
-    
     # Add context fields that exist
-    for field, formatter in context_fields:
+    for field, template in _CRAVING_DETAIL_FIELDS:
         value = craving.get(field)
         if value:
-            details += formatter(value)
+            details += template.format(value)
+
+    comments = craving.get("comments")
+    if comments:
+        details += f", notes: '{comments[:40]}{'...' if len(comments) > 40 else ''}'"
     
     # Add relapse indicator
     return details + (" [RELAPSED]" if craving.get("have_smoked") else "")
@@ -230,12 +239,17 @@ def _build_cravings_context(context: Dict[str, Any]) -> List[str]:
     if not cravings:
         return []
     
-    logger.info(f"Agent node processing {len(cravings)} cravings: {cravings[:1]}")
+    logger.debug("Agent node processing %s cravings", len(cravings))
     
-    # Calculate summary statistics
+    # Calculate summary statistics in a single pass
+    relapse_count = 0
+    desire_sum = 0
+    for c in cravings:
+        if c.get("have_smoked"):
+            relapse_count += 1
+        desire_sum += c.get("desire_range", 0)
     recent_count = len(cravings)
-    relapse_count = sum(1 for c in cravings if c.get("have_smoked"))
-    avg_desire = sum(c.get("desire_range", 0) for c in cravings) / len(cravings)
+    avg_desire = desire_sum / recent_count
     
     # Build context parts
     context_parts = [f"Recent Cravings: {recent_count} episodes (avg intensity: {avg_desire:.1f}/10)"]
@@ -279,10 +293,14 @@ def _build_diary_context(context: Dict[str, Any]) -> List[str]:
     if not entries:
         return []
     
-    # Calculate summary statistics  
+    # Calculate summary statistics in a single pass
+    craving_sum = 0
+    total_cravings = 0
+    for e in entries:
+        craving_sum += e.get("craving_range", 0)
+        total_cravings += e.get("number_of_cravings", 0)
     recent_count = len(entries)
-    avg_craving = sum(e.get("craving_range", 0) for e in entries) / len(entries)
-    total_cravings = sum(e.get("number_of_cravings", 0) for e in entries)
+    avg_craving = craving_sum / recent_count
     
     # Build context parts
     context_parts = [f"Recent Diary Entries: {recent_count} days tracked (avg craving level: {avg_craving:.1f}/10)"]
@@ -298,9 +316,9 @@ def _build_diary_context(context: Dict[str, Any]) -> List[str]:
 def _build_user_context_section(context: Dict[str, Any]) -> str:
     """Build the complete user context section for the system message."""
     # Debug log to track context availability
-    logger.info(f"Building user context section. Context keys available: {list(context.keys()) if context else 'None'}")
+    logger.debug("Building user context section. Context keys available: %s", context.keys() if context else None)
     if context and context.get("recent_cravings"):
-        logger.info(f"Context has {len(context['recent_cravings'])} recent cravings")
+        logger.debug("Context has %s recent cravings", len(context['recent_cravings']))
     
     if not context:
         return "\nUser Context: No preferences configured yet. The user should set up their quit date, smoking history, and goals for personalized advice."
@@ -316,41 +334,38 @@ def _build_user_context_section(context: Dict[str, Any]) -> str:
     all_context_parts.extend(_build_diary_context(context))
     
     if all_context_parts:
-        context_text = f"\nUser Context:\n" + "\n".join(f"- {part}" for part in all_context_parts)
+        buf = StringIO()
+        buf.write("\nUser Context:")
+        for part in all_context_parts:
+            buf.write("\n- ")
+            buf.write(part)
         # Add reminder about context persistence
-        context_text += "\n\nIMPORTANT: This context remains available throughout the entire conversation. Always refer to these details when discussing cravings, diary entries, goals, or progress, even if the topic changed and came back."
-        logger.info(f"Built complete user context with {len(all_context_parts)} sections")
-        return context_text
+        buf.write("\n\nIMPORTANT: This context remains available throughout the entire conversation. Always refer to these details when discussing cravings, diary entries, goals, or progress, even if the topic changed and came back.")
+        logger.debug("Built complete user context with %s sections", len(all_context_parts))
+        return buf.getvalue()
     else:
         logger.warning("No context parts available despite having context data")
         return "\nUser Context: No preferences configured yet. The user should set up their quit date, smoking history, and goals for personalized advice."
 
 
-import json  # if you decide to serialize anything (not needed here)
-
-def _build_system_message(context: Dict[str, Any], tool_descriptions: List[str]) -> str:
-    """Build the complete system message with context and tools."""
-    parts: List[str] = []
 
-    # Core policies belong in the system message
-    parts.append(SYSTEM_POLICY.strip())
-    parts.append(DEVELOPER_POLICY.strip())
+def _build_tools_section(tool_descriptions: List[str]) -> str:
+    """Build the tool list shown to the model; fixed for the lifetime of the agent."""
+    if not tool_descriptions:
+        return ""
+    return "\nAvailable Tools:\n" + "\n".join(f"- {desc}" for desc in tool_descriptions)
 
-    # Keep the exact refusal text available to the model (string only)
-    parts.append(f"\nRefusal message (use verbatim when refusing):\n{STRICT_REFUSAL_MSG.strip()}")
 
-    # Optional: tool policy text if it's a STRING; safe to include
-    parts.append(TOOLS_SPEC.strip())
+def _build_system_message(context: Dict[str, Any], tools_section: str) -> str:
+    """Build the complete system message with context and tools."""
+    # Static policy text and the tool list come first so the prompt prefix is
+    # byte-identical across users; only the trailing user context varies.
+    parts: List[str] = [SYSTEM_PROMPT_PREFIX, tools_section]
 
     # User context section
     parts.append(_build_user_context_section(context))
 
-    # Tool list visible to the model
-    if tool_descriptions:
-        parts.append("\nAvailable Tools:\n" + "\n".join(f"- {desc}" for desc in tool_descriptions))
-
-    # Only join strings
-    return "\n\n".join(p for p in parts if isinstance(p, str) and p.strip())
+    return "\n\n".join(p for p in parts if p.strip())
 
 
 
@@ -359,12 +374,15 @@ def _prepare_model_messages(messages: List[BaseMessage], system_message: str) ->
     if not messages:
         return [SystemMessage(content=system_message)]
     
-    first_turn = len(messages) == 1 and getattr(messages[0], "type", getattr(messages[0], "role", "human")) in ("human", "user")
-    leading_role = getattr(messages[0], "type", getattr(messages[0], "role", None))
+    first = messages[0]
+    leading_role = getattr(first, "type", None)
+    if leading_role is None:
+        leading_role = getattr(first, "role", None)
+    first_turn = len(messages) == 1 and leading_role in ("human", "user", None)
     
     # Handle tool sequence to avoid invalid message ordering
     if leading_role == "tool":
-        tool_content = getattr(messages[0], "content", "")
+        tool_content = getattr(first, "content", "")
         synthesized = ([SystemMessage(content=system_message)] if first_turn else [])
         synthesized.extend([
             SystemMessage(content="You just received a tool result. Use it to continue the response."),
@@ -372,44 +390,54 @@ def _prepare_model_messages(messages: List[BaseMessage], system_message: str) ->
         ])
         return synthesized
     
-    # Handle normal conversation flow
-    return [SystemMessage(content=system_message)] + messages if first_turn else messages
+    # Handle normal conversation flow; later turns pass the history through as is
+    if first_turn:
+        return [SystemMessage(content=system_message), first]
+    return messages
 
 
 def create_agent_node(model: BaseChatModel, tools: List[BaseTool]):
     """Create the main agent node with tool calling capabilities."""
     # Bind tools to the model so it can emit tool_calls
     model_with_tools = model.bind_tools(tools)
+    tools_section = _build_tools_section(_build_tool_descriptions(tools))
+
+    # The context only changes when the user's data does, so consecutive turns
+    # reuse the built prompt. It is keyed by the serialized context (plain
+    # JSON values from the chat router) and rebuilt from that same JSON on a
+    # miss, which keeps the cache free of per-call references.
+    @lru_cache(maxsize=SYSTEM_MESSAGE_CACHE_SIZE)
+    def _cached_system_message(context_json: bytes) -> str:
+        return _build_system_message(orjson.loads(context_json), tools_section)
     
-    def agent_node(state: AgentState) -> AgentState:
+    async def agent_node(state: AgentState) -> Dict[str, Any]:
         """Main agent node that processes messages and generates responses."""
         messages = state["messages"]
-        context = state.get("conversation_context", {})
-        
-        # Debug log to track conversation context availability
-        logger.info(f"Agent node: conversation_context keys: {list(context.keys()) if context else 'None'}")
-        if context and context.get("recent_cravings"):
-            logger.info(f"Agent node: Found {len(context['recent_cravings'])} cravings in conversation_context")
-        else:
-            logger.warning("Agent node: No recent_cravings found in conversation_context")
+        # Prompt context: the user's data straight from the state channels
+        # plus the derived fields added by the context node
+        context = {
+            field: value
+            for field in _USER_CONTEXT_FIELDS
+            if (value := state.get(field)) is not None
+        }
+        context.update(state.get("conversation_context") or {})
+        logger.debug("Agent node: context keys: %s", context.keys())
         
         # Build system message with context and tools
-        tool_descriptions = _build_tool_descriptions(tools)
-        system_message = _build_system_message(context, tool_descriptions)
+        system_message = _cached_system_message(
+            orjson.dumps(context or {}, option=orjson.OPT_SORT_KEYS, default=str)
+        )
         
         # Prepare messages for the model
         model_messages = _prepare_model_messages(messages, system_message)
         
         # Get response from model (with tools bound)
-        response = model_with_tools.invoke(model_messages)
-        
-        # Update state with new message
-        new_messages = messages + [response]
+        response = await model_with_tools.ainvoke(model_messages)
         
+        # add_messages appends the reply to the existing conversation
         return {
-            **state,
-            "messages": new_messages,
-            "current_step": "agent_response"
+            "messages": [response],
+            "current_step": "agent_response",
         }
     
     return agent_node
@@ -417,29 +445,23 @@ def create_agent_node(model: BaseChatModel, tools: List[BaseTool]):
 def create_response_formatter():
     """Create a node that formats the final response with user context."""
     
-    def response_formatter(state: AgentState) -> AgentState:
+    async def response_formatter(state: AgentState) -> Dict[str, Any]:
         # This node can be used to add final formatting, validation, or logging
-        return {
-            **state,
-            "current_step": "response_formatted"
-        }
+        return {"current_step": "response_formatted"}
     
     return response_formatter
 
 def should_continue(state: AgentState) -> str:
     """Determine if the agent should continue to tools, format response, or end."""
     messages = state["messages"]
-    last_message = messages[-1]
+    if not messages:
+        return "end"
     
     # Check if the last message has tool calls
-    if hasattr(last_message, 'tool_calls') and last_message.tool_calls:
+    if getattr(messages[-1], "tool_calls", None):
         return "tools"
     
-    # Check if we should format the response (e.g., add user context)
-    if state.get("conversation_context"):
-        return "format_response"
-    
-    return "end"
+    return "format_response"
 
 def create_user_context_message(user_data: Dict[str, Any]) -> str:
     """Create a context message from user data."""
@@ -473,11 +495,4 @@ def calculate_money_saved(quit_date: date, cigarettes_per_day: int, price_per_ci
 
 def get_milestone_message(days_since_quit: int) -> Optional[str]:
     """Get a milestone message based on days since quitting."""
-    milestones = {
-        1: "🎉 First day smoke-free! Your body is already healing.",
-        7: "🌟 One week! The worst of withdrawal is behind you.",
-        30: "🏆 One month! Your lung function is improving.",
-        90: "💪 Three months! Your risk of heart disease is decreasing.",
-        365: "🎊 One year! Your risk of heart disease is half that of a smoker.",
-    }
-    return milestones.get(days_since_quit)
+    return _MILESTONE_MESSAGES.get(days_since_quit)
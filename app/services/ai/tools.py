@@ -1,55 +1,64 @@
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import date, datetime, timedelta
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import date, timedelta
 from collections import Counter
+from contextvars import ContextVar
+from functools import lru_cache
 
-from langchain_tavily import TavilySearch
-from langchain_core.tools import BaseTool, tool
+import orjson
+from cachetools import TTLCache
+from langchain_core.tools import BaseTool, StructuredTool, tool
 from pydantic import BaseModel, Field
 
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
-
-from app.core.config import settings
 from app.core import health as health_calc
-from app.models.craving import Craving
-from app.models.preference import Preference
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Search tool for general information
-try:
-    search = TavilySearch(max_results=3)  # Increased results for better context
+# The Tavily tools pull in langchain_tavily and its HTTP client stack, so they
+# are built on first use rather than whenever this module is imported (the
+# chat router imports it for user_context_tool alone).
+@lru_cache(maxsize=1)
+def _get_search() -> Optional[BaseTool]:
+    """Search tool for general information, or None if Tavily is unavailable."""
+    try:
+        from langchain_tavily import TavilySearch
+
+        search = TavilySearch(max_results=3)  # Increased results for better context
+    except Exception as e:
+        logger.error("Failed to initialize Tavily search: %s", e)
+        return None
     logger.info("Tavily search tool initialized")
-except Exception as e:
-    logger.error(f"Failed to initialize Tavily search: {e}")
-    search = None
-
-# Academic paper search tool - focused on smoking cessation research
-try:
-    academic_search = TavilySearch(
-        max_results=5,
-        include_domains=[
-            "pubmed.ncbi.nlm.nih.gov",
-            "ncbi.nlm.nih.gov", 
-            "bmj.com",
-            "nejm.org",
-            "thelancet.com",
-            "jama.jamanetwork.com",
-            "cochranelibrary.com",
-            "who.int",
-            "cdc.gov",
-            "researchgate.net"
-        ]
-    )
-    logger.info("Tavily academic search tool initialized for smoking cessation research")
-except Exception as e:
-    logger.error(f"Failed to initialize Tavily academic search: {e}")
-    academic_search = None
+    return search
+
 
-# Create async engine for tools
-async_engine = create_async_engine(settings.database_url, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+@lru_cache(maxsize=1)
+def _get_academic_search() -> Optional[BaseTool]:
+    """Academic paper search tool - focused on smoking cessation research."""
+    try:
+        from langchain_tavily import TavilySearch
+
+        academic_search = TavilySearch(
+            max_results=5,
+            include_domains=[
+                "pubmed.ncbi.nlm.nih.gov",
+                "ncbi.nlm.nih.gov", 
+                "bmj.com",
+                "nejm.org",
+                "thelancet.com",
+                "jama.jamanetwork.com",
+                "cochranelibrary.com",
+                "who.int",
+                "cdc.gov",
+                "researchgate.net"
+            ]
+        )
+    except Exception as e:
+        logger.error("Failed to initialize Tavily academic search: %s", e)
+        return None
+    logger.info("Tavily academic search tool initialized for smoking cessation research")
+    return academic_search
 
 # Domain-specific tools for smoking cessation
 
@@ -57,6 +66,57 @@ class HealthCalculatorInput(BaseModel):
     quit_date: str = Field(..., description="The date when the user quit smoking (YYYY-MM-DD)")
     cigarettes_per_day: Optional[int] = Field(None, description="Number of cigarettes smoked per day")
 
+# compute_all() key and output line for each metric, in display order
+_HEALTH_LINE_TEMPLATES = (
+    ("nicotine_expelled", "Nicotine expelled: {}%"),
+    ("carbon_monoxide_level", "Carbon monoxide normalization: {}%"),
+    ("pulse_rate", "Pulse rate improvement: {}%"),
+    ("oxygen_levels", "Oxygen levels: {}%"),
+    ("taste_and_smell", "Taste & smell: {}%"),
+    ("breathing", "Breathing: {}%"),
+    ("energy_levels", "Energy levels: {}%"),
+    ("circulation", "Circulation: {}%"),
+    ("gum_texture", "Gum texture: {}%"),
+    ("immunity_and_lung_function", "Immunity & lung function: {}%"),
+    ("reduced_risk_of_heart_disease", "Reduced heart disease risk: {}%"),
+    ("decreased_risk_of_lung_cancer", "Reduced lung cancer risk: {}%"),
+    ("decreased_risk_of_heart_attack", "Reduced heart attack risk: {}%"),
+    ("life_regained_in_hours", "Estimated life regained: {} hours"),
+)
+
+# Structured tools answer with compact JSON instead of prose lines when set
+_JSON_TOOL_OUTPUT = settings.tool_output_format == "json"
+
+# The summary depends only on the day count and consumption, so repeated calls
+# (every turn that asks about health) reuse the formatted text
+@lru_cache(maxsize=4096)
+def _format_health(days_since_quit: int, cigarettes_per_day: Optional[int]) -> str:
+    """Format the health summary for a non-negative day count."""
+    # Same single pass over the precomputed tables as the /health endpoint
+    metrics = health_calc.compute_all(days_since_quit)
+
+    minutes_saved = None
+    if cigarettes_per_day is not None and cigarettes_per_day >= 0:
+        minutes_per_cigarette = 20
+        minutes_saved = days_since_quit * cigarettes_per_day * minutes_per_cigarette
+
+    if _JSON_TOOL_OUTPUT:
+        payload = {"days_since_quit": days_since_quit, **metrics}
+        if minutes_saved is not None:
+            payload["minutes_not_smoked"] = minutes_saved
+        return orjson.dumps(payload).decode()
+
+    lines = [f"Days since quit: {days_since_quit}"]
+    lines.extend(
+        template.format(metrics[name]) for name, template in _HEALTH_LINE_TEMPLATES
+    )
+
+    if minutes_saved is not None:
+        lines.append(f"Estimated minutes not smoked: {minutes_saved}")
+
+    return "\n".join(lines)
+
+
 @tool
 def calculate_health_improvements(quit_date: str, cigarettes_per_day: Optional[int] = None) -> str:
     """
@@ -66,8 +126,8 @@ def calculate_health_improvements(quit_date: str, cigarettes_per_day: Optional[i
       - cigarettes_per_day: optional, to estimate money/time benefits
     """
     try:
-        print("quit_date", quit_date)
-        quit_dt = datetime.strptime(quit_date, "%Y-%m-%d").date()
+        logger.debug("calculate_health_improvements quit_date=%s", quit_date)
+        quit_dt = date.fromisoformat(quit_date)
     except Exception:
         return "Invalid quit_date. Use format YYYY-MM-DD."
 
@@ -75,49 +135,49 @@ def calculate_health_improvements(quit_date: str, cigarettes_per_day: Optional[i
     if days_since_quit < 0:
         return f"Your quit date is in the future ({-days_since_quit} days from now)."
 
-    nicotine_expelled = health_calc.calculate_nicotine_expelled(days_since_quit)
-    carbon_monoxide = health_calc.calculate_carbon_monoxide_level(days_since_quit)
-    pulse_rate = health_calc.calculate_pulse_rate(days_since_quit)
-    oxygen_levels = health_calc.calculate_oxygen_levels(days_since_quit)
-    taste_smell = health_calc.calculate_taste_and_smell(days_since_quit)
-    breathing = health_calc.calculate_breathing(days_since_quit)
-    energy = health_calc.calculate_energy_levels(days_since_quit)
-    circulation = health_calc.calculate_circulation(days_since_quit)
-    gum_texture = health_calc.calculate_gum_texture(days_since_quit)
-    immunity_lung = health_calc.calculate_immunity_and_lung_function(days_since_quit)
-    heart_disease = health_calc.calculate_reduced_risk_of_heart_disease(days_since_quit)
-    lung_cancer = health_calc.calculate_decreased_risk_of_lung_cancer(days_since_quit)
-    heart_attack = health_calc.calculate_decreased_risk_of_heart_attack(days_since_quit)
-    life_hours = health_calc.calculate_life_regained_in_hours(days_since_quit)
-
-    lines = [
-        f"Days since quit: {days_since_quit}",
-        f"Nicotine expelled: {nicotine_expelled}%",
-        f"Carbon monoxide normalization: {carbon_monoxide}%",
-        f"Pulse rate improvement: {pulse_rate}%",
-        f"Oxygen levels: {oxygen_levels}%",
-        f"Taste & smell: {taste_smell}%",
-        f"Breathing: {breathing}%",
-        f"Energy levels: {energy}%",
-        f"Circulation: {circulation}%",
-        f"Gum texture: {gum_texture}%",
-        f"Immunity & lung function: {immunity_lung}%",
-        f"Reduced heart disease risk: {heart_disease}%",
-        f"Reduced lung cancer risk: {lung_cancer}%",
-        f"Reduced heart attack risk: {heart_attack}%",
-        f"Estimated life regained: {life_hours} hours",
-    ]
+    return _format_health(days_since_quit, cigarettes_per_day)
 
-    if cigarettes_per_day is not None and cigarettes_per_day >= 0:
-        minutes_per_cigarette = 20
-        minutes_saved = days_since_quit * cigarettes_per_day * minutes_per_cigarette
-        lines.append(f"Estimated minutes not smoked: {minutes_saved}")
 
-    return "\n".join(lines)
+# Focus research searches specifically on smoking cessation and tobacco control
+_SMOKING_KEYWORDS = (
+    "smoking cessation", "tobacco control", "nicotine addiction",
+    "smoking quit", "tobacco cessation", "nicotine withdrawal",
+)
+_RESEARCH_QUERY_PREFIX = f"({' OR '.join(_SMOKING_KEYWORDS)}) AND "
 
+# Formatted research results keyed by the normalized query. Tavily calls cost
+# hundreds of ms and are billed, and users ask the same things repeatedly;
+# errors are not stored. The lock is needed because the sync variant of the
+# tool runs in the threadpool.
+SEARCH_CACHE_TTL = 60 * 60  # seconds
+_search_cache: TTLCache = TTLCache(maxsize=512, ttl=SEARCH_CACHE_TTL)
+_search_cache_lock = threading.Lock()
 
-@tool
-def search_smoking_cessation_research(query: str) -> str:
+
+def _research_cache_key(query: str) -> str:
+    # Near-duplicate questions ("NRT patches" / "nrt  patches") share an entry
+    return " ".join(query.lower().split())
+
+
+def _cached_research(cache_key: str) -> Optional[str]:
+    with _search_cache_lock:
+        return _search_cache.get(cache_key)
+
+
+def _store_research(cache_key: str, query: str, results: Any) -> str:
+    if not results:
+        output = f"No smoking cessation research found for: {query}"
+    elif _JSON_TOOL_OUTPUT:
+        # Tavily's response dict as compact JSON rather than its Python repr
+        output = orjson.dumps(results, default=str).decode()
+    else:
+        output = f"Smoking cessation research results for '{query}':\n\n{results}"
+    with _search_cache_lock:
+        _search_cache[cache_key] = output
+    return output
+
+
+def _search_research(query: str) -> str:
     """
     Search for academic papers and research studies specifically about smoking cessation, tobacco control, 
     and related health topics from reliable medical and scientific sources.
@@ -132,49 +192,131 @@ def search_smoking_cessation_research(query: str) -> str:
     Returns:
         String containing relevant academic research findings from trusted medical sources
     """
+    academic_search = _get_academic_search()
     if not academic_search:
         return "Academic search tool is not available."
-    
+
+    cache_key = _research_cache_key(query)
+    if (cached := _cached_research(cache_key)) is not None:
+        return cached
+
     try:
-        # Focus the search specifically on smoking cessation and tobacco control
-        smoking_keywords = [
-            "smoking cessation", "tobacco control", "nicotine addiction", 
-            "smoking quit", "tobacco cessation", "nicotine withdrawal"
-        ]
-        
         # Create a focused query that combines the user's query with smoking cessation context
-        focused_query = f"({' OR '.join(smoking_keywords)}) AND {query}"
-        
-        results = academic_search.invoke(focused_query)
-        
-        if not results:
-            return f"No smoking cessation research found for: {query}"
-        
-        return f"Smoking cessation research results for '{query}':\n\n{results}"
+        results = academic_search.invoke(_RESEARCH_QUERY_PREFIX + query)
     except Exception as e:
-        logger.error(f"Error searching smoking cessation research: {e}")
+        logger.error("Error searching smoking cessation research: %s", e)
         return f"Error searching academic research: {str(e)}"
+    return _store_research(cache_key, query, results)
+
+
+async def _asearch_research(query: str) -> str:
+    """Async variant of _search_research; awaits Tavily's HTTP call directly."""
+    academic_search = _get_academic_search()
+    if not academic_search:
+        return "Academic search tool is not available."
+
+    cache_key = _research_cache_key(query)
+    if (cached := _cached_research(cache_key)) is not None:
+        return cached
+
+    try:
+        results = await academic_search.ainvoke(_RESEARCH_QUERY_PREFIX + query)
+    except Exception as e:
+        logger.error("Error searching smoking cessation research: %s", e)
+        return f"Error searching academic research: {str(e)}"
+    return _store_research(cache_key, query, results)
+
+
+# The agent runs the graph asynchronously, so ToolNode awaits the coroutine
+# instead of parking a threadpool worker on the request; invoke() still works.
+search_smoking_cessation_research = StructuredTool.from_function(
+    func=_search_research,
+    coroutine=_asearch_research,
+    name="search_smoking_cessation_research",
+)
+
+
+def clear_search_cache() -> None:
+    """Drop all cached research search results."""
+    with _search_cache_lock:
+        _search_cache.clear()
 
 
 class UserContextTool:
-    """Simple synchronous user context access."""
+    """
+    Per-request user context access for the agent's tools.
+
+    Backed by context variables: the chat request sets them, and the graph
+    tasks and tool threads it starts copy that context, so concurrent
+    requests never see each other's user data.
+    """
     def __init__(self):
-        self.current_user_id = None
-        self.current_context = {}
+        self._user_id: ContextVar[Optional[str]] = ContextVar("chat_user_id", default=None)
+        self._context: ContextVar[Optional[dict]] = ContextVar("chat_user_context", default=None)
+
+    @property
+    def current_user_id(self) -> Optional[str]:
+        return self._user_id.get()
+
+    @property
+    def current_context(self) -> dict:
+        return self.get_context()
     
     def set_context(self, user_id: str, context: dict):
         """Set the current user context."""
-        self.current_user_id = user_id
-        self.current_context = context
+        self._user_id.set(user_id)
+        self._context.set(context)
     
     def get_context(self) -> dict:
         """Get the current user context."""
-        return self.current_context
+        return self._context.get() or {}
 
-# Global instance to share context between requests
+# Shared accessor; the values it holds are per request
 user_context_tool = UserContextTool()
 
 
+# Optional craving fields listed under an episode, in display order
+_CRAVING_DETAIL_LINES = (
+    ("feeling", "  Feelings: {}"),
+    ("activity", "  Activity: {}"),
+    ("company", "  Company: {}"),
+    ("comments", "  Notes: {}"),
+)
+
+
+def _craving_lines(cravings: List[Dict[str, Any]]) -> Iterator[str]:
+    """Yield the get_user_cravings report line by line."""
+    yield f"Recent Craving Episodes ({len(cravings)} total):"
+    for i, craving in enumerate(cravings, 1):
+        yield f"\nEpisode {i}:"
+        yield f"  Date: {craving.get('date', 'Unknown')}"
+        yield f"  Intensity: {craving.get('desire_range', 0)}/10"
+        for field, template in _CRAVING_DETAIL_LINES:
+            if value := craving.get(field):
+                yield template.format(value)
+        if craving.get("have_smoked"):
+            yield f"  Outcome: RELAPSED - smoked {craving.get('number_of_cigarets_smoked', 0)} cigarettes"
+        else:
+            yield "  Outcome: Successfully resisted"
+
+
+def _diary_lines(entries: List[Dict[str, Any]]) -> Iterator[str]:
+    """Yield the get_user_diary report line by line."""
+    yield f"Recent Diary Entries ({len(entries)} total):"
+    for i, entry in enumerate(entries, 1):
+        yield f"\nDay {i}:"
+        yield f"  Date: {entry.get('date', 'Unknown')}"
+        yield f"  Daily Craving Level: {entry.get('craving_range', 0)}/10"
+        if (craving_count := entry.get("number_of_cravings", 0)) > 0:
+            yield f"  Number of Cravings: {craving_count}"
+        if entry.get("have_smoked"):
+            yield f"  Outcome: RELAPSED - smoked {entry.get('number_of_cigarets_smoked', 0)} cigarettes"
+        else:
+            yield "  Outcome: Stayed smoke-free"
+        if notes := entry.get("notes"):
+            yield f"  Notes: {notes}"
+
+
 @tool
 def get_user_cravings() -> str:
     """
@@ -190,31 +332,7 @@ def get_user_cravings() -> str:
     if not cravings:
         return "No recent craving episodes found. The user may not have logged any cravings yet."
     
-    details = [f"Recent Craving Episodes ({len(cravings)} total):"]
-    
-    for i, craving in enumerate(cravings, 1):
-        episode = [f"\nEpisode {i}:"]
-        episode.append(f"  Date: {craving.get('date', 'Unknown')}")
-        episode.append(f"  Intensity: {craving.get('desire_range', 0)}/10")
-        
-        if craving.get("feeling"):
-            episode.append(f"  Feelings: {craving['feeling']}")
-        if craving.get("activity"):
-            episode.append(f"  Activity: {craving['activity']}")
-        if craving.get("company"):
-            episode.append(f"  Company: {craving['company']}")
-        if craving.get("comments"):
-            episode.append(f"  Notes: {craving['comments']}")
-        
-        if craving.get("have_smoked"):
-            cigarettes = craving.get('number_of_cigarets_smoked', 0)
-            episode.append(f"  Outcome: RELAPSED - smoked {cigarettes} cigarettes")
-        else:
-            episode.append("  Outcome: Successfully resisted")
-        
-        details.extend(episode)
-    
-    return "\n".join(details)
+    return "\n".join(_craving_lines(cravings))
 
 
 @tool
@@ -232,29 +350,7 @@ def get_user_diary() -> str:
     if not entries:
         return "No recent diary entries found. The user may not have made any diary entries yet."
     
-    details = [f"Recent Diary Entries ({len(entries)} total):"]
-    
-    for i, entry in enumerate(entries, 1):
-        day = [f"\nDay {i}:"]
-        day.append(f"  Date: {entry.get('date', 'Unknown')}")
-        day.append(f"  Daily Craving Level: {entry.get('craving_range', 0)}/10")
-        
-        craving_count = entry.get("number_of_cravings", 0)
-        if craving_count > 0:
-            day.append(f"  Number of Cravings: {craving_count}")
-        
-        if entry.get("have_smoked"):
-            cigarettes = entry.get('number_of_cigarets_smoked', 0)
-            day.append(f"  Outcome: RELAPSED - smoked {cigarettes} cigarettes")
-        else:
-            day.append("  Outcome: Stayed smoke-free")
-        
-        if entry.get("notes"):
-            day.append(f"  Notes: {entry['notes']}")
-        
-        details.extend(day)
-    
-    return "\n".join(details)
+    return "\n".join(_diary_lines(entries))
 
 
 @tool  
@@ -292,18 +388,21 @@ def get_user_progress() -> str:
     return "\n".join(progress)
 
 
-# Compile tools list with error handling
-TOOLS: List[BaseTool] = []
+@lru_cache(maxsize=1)
+def get_tools() -> List[BaseTool]:
+    """Compile the agent's tools list; built once, when the agent is created."""
+    tools: List[BaseTool] = []
 
-if search:
-    TOOLS.append(search)
+    if search := _get_search():
+        tools.append(search)
 
-TOOLS.extend([
-    calculate_health_improvements,
-    search_smoking_cessation_research,
-    get_user_cravings,
-    get_user_diary,
-    get_user_progress,
-])
+    tools.extend([
+        calculate_health_improvements,
+        search_smoking_cessation_research,
+        get_user_cravings,
+        get_user_diary,
+        get_user_progress,
+    ])
 
-logger.info(f"Initialized {len(TOOLS)} tools for the agent")
+    logger.info("Initialized %s tools for the agent", len(tools))
+    return tools
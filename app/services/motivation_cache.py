@@ -0,0 +1,94 @@
+"""
+Reuse of generated motivations across users with the same inputs.
+
+Users with the same language, reason and goals who are in the same week of
+their quit get an equivalent prompt, so a reply generated for one of them is
+stored as a template and filled in for the others instead of calling the
+model again. Those prompts carry a `{days}` placeholder instead of the day
+count, which the model keeps in its reply; it is the template's only slot.
+"""
+
+import hashlib
+import logging
+from typing import Optional
+
+import orjson
+from redis.exceptions import RedisError
+
+from app.core.cache import cache_get, cache_set, redis
+from app.models.preference import Preference
+from app.schemas.motivation import DetailedMotivationOut
+
+logger = logging.getLogger(__name__)
+
+MOTIVATION_CACHE_TTL = 24 * 60 * 60  # seconds
+MOTIVATION_CACHE_STATS_KEY = "motivation:cache:stats"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def motivation_cache_key(pref: Preference) -> str:
+    """Key shared by every preference that produces an equivalent prompt."""
+    days = pref.days_smoke_free
+    # Before and on the quit date the intro differs per day, so only
+    # smoke-free users share a week's key; the prefixes keep the ranges apart
+    bucket = f"w{days // 7}" if days > 0 else f"d{days}"
+    # Goals are per-user rows, so they are matched on their text, not ids
+    goals = sorted(_normalize(g.description) for g in (pref.goals or []))
+    raw = f"{pref.language}|{bucket}|{goals}|{_normalize(pref.reason)}"
+    return f"motivation:tpl:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def uses_days_placeholder(days: int) -> bool:
+    """Whether the prompt for `days` should carry the `{days}` placeholder."""
+    return days > 0
+
+
+def _to_template(text: str) -> str:
+    # escape every brace except the placeholder the model was asked to keep
+    return text.replace("{", "{{").replace("}", "}}").replace("{{days}}", "{days}")
+
+
+def _fill(template: dict, days: int) -> DetailedMotivationOut:
+    slots = {"days": days}
+    return DetailedMotivationOut.model_construct(
+        **{
+            name: value.format_map(slots) if value is not None else None
+            for name, value in template.items()
+        }
+    )
+
+
+async def _count(field: str) -> None:
+    try:
+        await redis.hincrby(MOTIVATION_CACHE_STATS_KEY, field, 1)
+    except RedisError:
+        logger.warning("Redis HINCRBY failed for %s", field, exc_info=True)
+
+
+async def get_cached_motivation(
+    key: str, days: int
+) -> Optional[DetailedMotivationOut]:
+    """Return the template under `key` filled in for `days`, or None on a miss."""
+    cached = await cache_get(key)
+    await _count("hits" if cached is not None else "misses")
+    if cached is None:
+        return None
+    return _fill(orjson.loads(cached), days)
+
+
+async def store_cached_motivation(
+    key: str, days: int, mot: DetailedMotivationOut
+) -> DetailedMotivationOut:
+    """
+    Store the reply `mot` as the template for `key` and return it filled in
+    for `days`.
+    """
+    template = {
+        name: _to_template(value) if value is not None else None
+        for name, value in mot.model_dump().items()
+    }
+    await cache_set(key, orjson.dumps(template), MOTIVATION_CACHE_TTL)
+    return _fill(template, days)
@@ -1,30 +1,180 @@
-import json
-import re
+import logging
 from datetime import date
+from typing import Any
 
 from fastapi import HTTPException
 
 # If you have openai>=1.x:
+import openai
 from openai import AsyncOpenAI
-from sqlalchemy import delete, select
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    stop_after_delay,
+    wait_random_exponential,
+)
 
 from app.core.config import settings
 from app.models.motivation import DailyMotivation
 from app.models.preference import Preference
-from app.prompts.motivation import get_motivation_prompt
+from app.prompts.motivation import (
+    MOTIVATION_GROUP_SYSTEM_PROMPT,
+    MOTIVATION_SYSTEM_PROMPT,
+    get_motivation_prompt,
+)
 from app.schemas.motivation import DetailedMotivationOut
+from app.services.motivation_cache import (
+    get_cached_motivation,
+    motivation_cache_key,
+    store_cached_motivation,
+    uses_days_placeholder,
+)
+from app.services.openai_limiter import OpenAILimiter
+
+logger = logging.getLogger(__name__)
 
 client = AsyncOpenAI(api_key=settings.openai_api_key)
 
 
-async def generate_and_save_for_user(db: AsyncSession, user_id: int) -> DailyMotivation:
+MOTIVATION_MODEL = "gpt-4o-mini"
+
+# Structured Outputs: the reply is guaranteed to be this JSON object, so it
+# can be parsed as-is. Strict schemas need every key required.
+_MOTIVATION_FIELDS = list(DetailedMotivationOut.model_fields)
+_MOTIVATION_SCHEMA: dict[str, Any] = {
+    "type": "object",
+    "properties": {name: {"type": "string"} for name in _MOTIVATION_FIELDS},
+    "required": _MOTIVATION_FIELDS,
+    "additionalProperties": False,
+}
+
+
+def _json_schema_format(name: str, schema: dict) -> dict:
+    return {
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    }
+
+
+MOTIVATION_RESPONSE_FORMAT = _json_schema_format(
+    "DetailedMotivationOut", _MOTIVATION_SCHEMA
+)
+# One motivation per user of a grouped request, tagged with the user's id
+MOTIVATION_GROUP_RESPONSE_FORMAT = _json_schema_format(
+    "MotivationGroup",
+    {
+        "type": "object",
+        "properties": {
+            "results": {
+                "type": "array",
+                "items": {
+                    **_MOTIVATION_SCHEMA,
+                    "properties": {
+                        "id": {"type": "integer"},
+                        **_MOTIVATION_SCHEMA["properties"],
+                    },
+                    "required": ["id", *_MOTIVATION_FIELDS],
+                },
+            }
+        },
+        "required": ["results"],
+        "additionalProperties": False,
+    },
+)
+
+
+# Built once and shared by every request (never mutated), so each call
+# starts with the same system message
+_SYSTEM_MESSAGE = {"role": "system", "content": MOTIVATION_SYSTEM_PROMPT}
+_GROUP_SYSTEM_MESSAGE = {"role": "system", "content": MOTIVATION_GROUP_SYSTEM_PROMPT}
+
+
+class _GroupMotivation(DetailedMotivationOut):
+    id: int
+
+
+class _GroupReply(BaseModel):
+    results: list[_GroupMotivation]
+
+
+def completion_params(
+    messages: list[dict],
+    *,
+    max_tokens: int = settings.motivation_max_tokens,
+    response_format: dict = MOTIVATION_RESPONSE_FORMAT,
+) -> dict:
+    """Chat Completions arguments for a motivation request (API and Batch API)."""
+    return {
+        "model": MOTIVATION_MODEL,
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": 0.7,
+        "response_format": response_format,
+    }
+
+
+# the SDK's own retries are turned off so they don't multiply with ours
+_limiter = OpenAILimiter(
+    client.with_options(max_retries=0),
+    rpm=settings.openai_rpm_limit,
+    tpm=settings.openai_tpm_limit,
+)
+_RETRYABLE = retry_if_exception_type(
+    (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+)
+
+
+def _wait_retry_after(cap: float):
+    """Wait as long as a 429's Retry-After asks, else back off exponentially."""
+    backoff = wait_random_exponential(min=1, max=cap)
+
+    def wait(retry_state) -> float:
+        exc = retry_state.outcome.exception()
+        if isinstance(exc, openai.RateLimitError):
+            retry_after = exc.response.headers.get("retry-after")
+            try:
+                return min(float(retry_after), cap)
+            except (TypeError, ValueError):
+                pass
+        return backoff(retry_state)
+
+    return wait
+
+
+# The daily job can afford to sit out a 429 burst
+@retry(
+    wait=_wait_retry_after(60),
+    stop=stop_after_attempt(6),
+    retry=_RETRYABLE,
+    reraise=True,
+)
+async def _call_openai(params: dict):
+    return await _limiter.chat_completion(**params)
+
+
+# An HTTP request (and its DB session) waiting on the model gets one short retry
+@retry(
+    wait=_wait_retry_after(5),
+    stop=stop_after_attempt(2) | stop_after_delay(10),
+    retry=_RETRYABLE,
+    reraise=True,
+)
+async def _call_openai_interactive(params: dict):
+    return await _limiter.chat_completion(**params)
+
+
+async def load_preference(db: AsyncSession, user_id: int) -> Preference:
     """
-    Generate today's motivation for a single user, store it (replacing
-    any existing row for today), and return the DailyMotivation record.
+    Load a user's preference with its goals.
+
+    Raises a 400 HTTPException if the user has no preference yet.
     """
-    # 1) load preference WITH goals eagerly to avoid async lazy-loads
+    # load preference WITH goals eagerly to avoid async lazy-loads
     pref_res = await db.execute(
         select(Preference)
         .options(selectinload(Preference.goals))
@@ -35,19 +185,12 @@ async def generate_and_save_for_user(db: AsyncSession, user_id: int) -> DailyMot
         raise HTTPException(
             status_code=400, detail=f"No preference set for user {user_id}"
         )
+    return pref
 
-    today = date.today()
 
-    # 2) delete stale row for today (idempotent)
-    await db.execute(
-        delete(DailyMotivation).where(
-            DailyMotivation.user_id == user_id,
-            DailyMotivation.date == today,
-        )
-    )
-
-    # 3) compute progress intro
-    days = (today - pref.quit_date).days
+def _user_context(pref: Preference, days_placeholder: bool = False) -> str:
+    # 1) compute progress intro
+    days = pref.days_smoke_free
     if days < 0:
         intro = (
             f"Your quit date is coming up in {-days} days. "
@@ -60,47 +203,184 @@ async def generate_and_save_for_user(db: AsyncSession, user_id: int) -> DailyMot
             "long-term well-being."
         )
     else:
+        # a reply meant for reuse across the week gets a slot, not the number
+        shown = "{days}" if days_placeholder else days
         intro = (
-            f"After {days} days smoke-free, significant health improvements "
+            f"After {shown} days smoke-free, significant health improvements "
             "include enhanced lung function and a steadier heart rate."
         )
 
-    # 4) build & call OpenAI (async)
+    # 2) build the prompt
     goal_descriptions = [g.description for g in (pref.goals or [])]
-    prompt = get_motivation_prompt(
+    return get_motivation_prompt(
         intro, pref.reason, goal_descriptions, days, pref.language
     )
 
-    resp = await client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a caring, evidence-based coach."},
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=2000,
-        temperature=0.7,
-    )
 
-    raw = resp.choices[0].message.content.strip()
-    clean = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw, flags=re.MULTILINE)
+def motivation_messages(pref: Preference, days_placeholder: bool = False) -> list[dict]:
+    """
+    Build the chat messages that generate today's motivation for `pref`.
 
+    With `days_placeholder`, the day count is sent as `{days}` (see
+    motivation_cache).
+    """
+    return [
+        _SYSTEM_MESSAGE,
+        {"role": "user", "content": _user_context(pref, days_placeholder)},
+    ]
+
+
+def parse_motivation_reply(content: str | None) -> DetailedMotivationOut:
+    """Validate a model reply; raises a 502 HTTPException if it is invalid."""
+    # a reply cut off at max_tokens is still invalid JSON
     try:
-        data = json.loads(clean)
-        mot = DetailedMotivationOut.model_validate(data)
-    except Exception as e:
+        return DetailedMotivationOut.model_validate_json(content)
+    except ValidationError as e:
         raise HTTPException(status_code=502, detail="Invalid model response") from e
 
-    # 5) persist
+
+async def _store_motivation(
+    db: AsyncSession, user_id: int, day: date, mot: DetailedMotivationOut
+) -> DailyMotivation:
+    # delete stale row for the day (idempotent)
+    await db.execute(
+        delete(DailyMotivation).where(
+            DailyMotivation.user_id == user_id,
+            DailyMotivation.date == day,
+        )
+    )
+
     record = DailyMotivation(
         user_id=user_id,
-        date=today,
-        progress=mot.progress,
-        motivation=mot.motivation,
-        cravings=mot.cravings,
-        ideas=mot.ideas,
-        recommendations=mot.recommendations,
+        date=day,
+        payload=mot.model_dump(),
     )
     db.add(record)
+    # eager_defaults brings id and timestamps back with the INSERT, and the
+    # (deferred) payload is already set, so no refresh is needed
     await db.commit()
-    await db.refresh(record)
     return record
+
+
+async def store_motivations(
+    db: AsyncSession, day: date, payloads: dict[int, dict]
+) -> None:
+    """
+    Store many users' motivations for `day` (user id -> payload) with one
+    DELETE of their existing rows and one executemany INSERT.
+    """
+    if not payloads:
+        return
+    await db.execute(
+        delete(DailyMotivation).where(
+            DailyMotivation.user_id.in_(payloads),
+            DailyMotivation.date == day,
+        )
+    )
+    await db.execute(
+        insert(DailyMotivation),
+        [
+            {"user_id": user_id, "date": day, "payload": payload}
+            for user_id, payload in payloads.items()
+        ],
+    )
+    await db.commit()
+
+
+async def generate_motivation(
+    db: AsyncSession, user_id: int, *, interactive: bool = False
+) -> DetailedMotivationOut:
+    """
+    Generate (without storing) today's motivation for a single user.
+
+    `interactive` callers are serving a request and give up on the model
+    after a short retry instead of the daily job's long backoff.
+    """
+    pref = await load_preference(db, user_id)
+    days = pref.days_smoke_free
+
+    cache_key = motivation_cache_key(pref) if settings.motivation_reuse_cache else None
+    if cache_key:
+        cached = await get_cached_motivation(cache_key, days)
+        if cached is not None:
+            return cached
+
+    templated = cache_key is not None and uses_days_placeholder(days)
+    call = _call_openai_interactive if interactive else _call_openai
+    resp = await call(
+        completion_params(motivation_messages(pref, days_placeholder=templated))
+    )
+    if resp.usage and resp.usage.prompt_tokens_details:
+        logger.debug(
+            "Motivation prompt for user %s: %s of %s tokens cached",
+            user_id,
+            resp.usage.prompt_tokens_details.cached_tokens,
+            resp.usage.prompt_tokens,
+        )
+
+    mot = parse_motivation_reply(resp.choices[0].message.content)
+    if cache_key:
+        # also fills the {days} placeholder in this user's copy
+        mot = await store_cached_motivation(cache_key, days, mot)
+    return mot
+
+
+async def generate_and_save_for_user(db: AsyncSession, user_id: int) -> DailyMotivation:
+    """
+    Generate today's motivation for a single user, store it (replacing
+    any existing row for today), and return the DailyMotivation record.
+    """
+    today = date.today()
+    mot = await generate_motivation(db, user_id, interactive=True)
+    return await _store_motivation(db, user_id, today, mot)
+
+
+async def generate_group_motivations(
+    db: AsyncSession, user_ids: list[int]
+) -> dict[int, dict]:
+    """
+    Generate (without storing) today's motivations for several users with
+    one completion.
+
+    Returns a payload per user id the reply covered; the caller generates
+    the others individually.
+    """
+    prefs = (
+        (
+            await db.execute(
+                select(Preference)
+                .options(selectinload(Preference.goals))
+                .where(Preference.user_id.in_(user_ids))
+            )
+        )
+        .scalars()
+        .all()
+    )
+    messages = [
+        _GROUP_SYSTEM_MESSAGE,
+        {
+            "role": "user",
+            "content": "\n".join(
+                f"id: {pref.user_id}\n{_user_context(pref)}" for pref in prefs
+            ),
+        },
+    ]
+    # each motivation is long; gpt-4o-mini allows 16k completion tokens
+    resp = await _call_openai(
+        completion_params(
+            messages,
+            max_tokens=min(settings.motivation_max_tokens * len(prefs), 16000),
+            response_format=MOTIVATION_GROUP_RESPONSE_FORMAT,
+        )
+    )
+    try:
+        reply = _GroupReply.model_validate_json(resp.choices[0].message.content)
+    except ValidationError as e:
+        raise HTTPException(status_code=502, detail="Invalid model response") from e
+
+    # keep the first result per requested user; ignore ids the model made up
+    payloads = {}
+    for result in reply.results:
+        if result.id in user_ids and result.id not in payloads:
+            payloads[result.id] = result.model_dump(exclude={"id"})
+    return payloads
@@ -0,0 +1,105 @@
+"""
+Client-side rate limiting for OpenAI calls.
+
+Requests wait for room in a requests-per-minute and a tokens-per-minute
+bucket before they are sent, so concurrent jobs slow down instead of
+running into 429s.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any
+
+import tiktoken
+from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Bucket of `capacity` units refilled continuously over a minute."""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0  # units per second
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1) -> None:
+        # a request larger than the bucket would wait forever; let it drain it
+        amount = min(amount, self.capacity)
+        # the lock keeps waiters in FIFO order while one of them sleeps
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+
+# Encodings loaded so far, by model. tiktoken downloads the BPE file with a
+# blocking, timeout-less request on a cold cache, so it is only ever called
+# from a worker thread; failures are retried after a pause, not remembered.
+_encodings: dict[str, tiktoken.Encoding] = {}
+_encoding_failed_at: dict[str, float] = {}
+_ENCODING_RETRY_SECONDS = 300
+_encoding_lock = asyncio.Lock()
+
+
+async def load_encoding(model: str) -> None:
+    """Load the tiktoken encoding for `model` off the event loop."""
+    if model in _encodings:
+        return
+    async with _encoding_lock:
+        failed_at = _encoding_failed_at.get(model)
+        if model in _encodings or (
+            failed_at is not None
+            and time.monotonic() - failed_at < _ENCODING_RETRY_SECONDS
+        ):
+            return
+        try:
+            _encodings[model] = await asyncio.to_thread(
+                tiktoken.encoding_for_model, model
+            )
+        except Exception:
+            # unknown model or the encoding file can't be fetched
+            _encoding_failed_at[model] = time.monotonic()
+            logger.warning(
+                "No tiktoken encoding for %s; estimating", model, exc_info=True
+            )
+
+
+def estimate_tokens(model: str, messages: list[dict], max_tokens: int) -> int:
+    """Upper-bound token cost of a chat completion, as OpenAI counts it for TPM."""
+    text = "".join(str(m.get("content") or "") for m in messages)
+    # never loads the encoding itself: see load_encoding
+    encoding = _encodings.get(model)
+    prompt = len(encoding.encode(text)) if encoding else len(text) // 4 + 1
+    # a few tokens of framing per message
+    return prompt + 4 * len(messages) + max_tokens
+
+
+class OpenAILimiter:
+    """Sends chat completions through `client` within RPM and TPM limits."""
+
+    def __init__(self, client: AsyncOpenAI, rpm: int, tpm: int):
+        self.client = client
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+
+    async def chat_completion(self, **params: Any):
+        await load_encoding(params["model"])
+        await self.requests.acquire()
+        await self.tokens.acquire(
+            estimate_tokens(
+                params["model"], params["messages"], params.get("max_tokens") or 0
+            )
+        )
+        return await self.client.chat.completions.create(**params)
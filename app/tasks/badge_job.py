@@ -1,33 +1,22 @@
-from datetime import datetime
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.dialects.postgresql import insert
 
-from app.core.config import settings
+from app.db_config.db_async_session import async_session
 from app.models.badge import Badge
 from app.models.preference import Preference
-from app.models.user import User
+from app.models.user_badge import user_badges
 
-engine = create_async_engine(settings.database_url, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(
-    engine, expire_on_commit=False, class_=AsyncSession
-)
+# Every (user, badge) pair whose threshold the user has reached, inserted in
+# one INSERT ... SELECT; ON CONFLICT skips the badges users already own
+_AWARD_DUE_BADGES = insert(user_badges).from_select(
+    ["user_id", "badge_id"],
+    select(Preference.user_id, Badge.id).where(
+        Preference.days_smoke_free * 24 * 60 >= Badge.condition_time
+    ),
+).on_conflict_do_nothing(index_elements=["user_id", "badge_id"])
 
 
 async def assign_due_badges() -> None:
-    now = datetime.utcnow()
-    async with AsyncSessionLocal() as db:
-        prefs = (await db.execute(select(Preference))).scalars().all()
-        badges = (await db.execute(select(Badge))).scalars().all()
-
-        for pref in prefs:
-            user = await db.get(User, pref.user_id)
-            if not user:
-                continue
-            minutes_since_quit = int((now.date() - pref.quit_date).days * 24 * 60)
-            for badge in badges:
-                if (
-                    badge.id not in {b.id for b in user.badges}
-                    and minutes_since_quit >= badge.condition_time
-                ):
-                    user.badges.append(badge)
-        await db.commit()
+    # begin() commits once on exit, so the new awards land in one transaction
+    async with async_session.begin() as db:
+        await db.execute(_AWARD_DUE_BADGES)
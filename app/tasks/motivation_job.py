@@ -1,21 +1,322 @@
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Sequence
+from datetime import date
 
+import orjson
+from redis.exceptions import RedisError
+from sqlalchemy import Row, Select, select
+from sqlalchemy.orm import selectinload
+from tenacity import (
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.core.cache import redis
 from app.core.config import settings
+from app.db_config.db_async_session import async_session
 from app.models.preference import Preference
-from app.services.motivation_service import generate_and_save_for_user
-
-engine = create_async_engine(settings.database_url, pool_pre_ping=True)
-AsyncSessionLocal = async_sessionmaker(
-    engine, expire_on_commit=False, class_=AsyncSession
+from app.services.motivation_service import (
+    client,
+    completion_params,
+    generate_group_motivations,
+    generate_motivation,
+    motivation_messages,
+    parse_motivation_reply,
+    store_motivations,
 )
 
+logger = logging.getLogger(__name__)
+
+# Redis set of submitted Batch API job ids still waiting to be collected
+PENDING_BATCHES_KEY = "motivation:batches"
+# Submission time of the newest batch run stored for a day (ISO date)
+_LATEST_RUN_KEY = "motivation:batch_run:{day}"
+_LATEST_RUN_TTL = 3 * 24 * 3600
+# Batch API limits per input file: 50,000 requests and 200 MB
+_BATCH_MAX_REQUESTS = 50_000
+_BATCH_MAX_BYTES = 190 * 1024 * 1024
+# Batch statuses that can still change
+_BATCH_RUNNING = {"validating", "in_progress", "finalizing", "cancelling"}
+# Smaller groups save too little to be worth a combined prompt
+_MIN_GROUP_SIZE = 3
+# Generated motivations written per bulk DELETE + INSERT
+_WRITE_BATCH_SIZE = 500
+# Preferences read per keyset page
+_PAGE_SIZE = 500
+
+
+async def _preference_pages(stmt: Select) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield the rows of `stmt`, whose first column must be Preference.user_id,
+    in pages ordered by user id. Each page is read in its own short session,
+    so no cursor or transaction stays open while the caller works through
+    the rows.
+    """
+    last_user_id = 0
+    while True:
+        async with async_session() as db:
+            rows = (
+                await db.execute(
+                    stmt.where(Preference.user_id > last_user_id)
+                    .order_by(Preference.user_id)
+                    .limit(_PAGE_SIZE)
+                )
+            ).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < _PAGE_SIZE:
+            return
+        last_user_id = rows[-1][0]
+
+
+class _PendingMotivations:
+    """Generated motivations for `day`, written to the database in bulk."""
+
+    def __init__(self, day: date):
+        self.day = day
+        self.payloads: dict[int, dict] = {}
+
+    async def add(self, payloads: dict[int, dict]) -> None:
+        self.payloads.update(payloads)
+        if len(self.payloads) >= _WRITE_BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self) -> None:
+        # swapped out first: other tasks keep adding while this one writes
+        payloads, self.payloads = self.payloads, {}
+        if not payloads:
+            return
+        try:
+            async with async_session() as db:
+                await store_motivations(db, self.day, payloads)
+        except Exception:
+            logger.exception("Storing %s daily motivations failed", len(payloads))
+
+
+async def _generate_for_user(pending: _PendingMotivations, user_id: int) -> None:
+    # Each task gets its own session: an AsyncSession is not safe for
+    # concurrent use, and one user's failure must not affect another's
+    try:
+        async with async_session() as db:
+            mot = await generate_motivation(db, user_id)
+    except Exception:
+        logger.exception("Daily motivation failed for user %s", user_id)
+        return
+    await pending.add({user_id: mot.model_dump()})
+
+
+async def _generate_for_group(pending: _PendingMotivations, user_ids: list[int]) -> None:
+    try:
+        async with async_session() as db:
+            payloads = await generate_group_motivations(db, user_ids)
+    except Exception:
+        logger.exception("Grouped daily motivation failed for users %s", user_ids)
+        payloads = {}
+    await pending.add(payloads)
+    for user_id in user_ids:
+        if user_id not in payloads:
+            await _generate_for_user(pending, user_id)
+
+
+async def _release_after(sem: asyncio.Semaphore, coro) -> None:
+    try:
+        await coro
+    finally:
+        # acquired by the dispatcher before this task was created
+        sem.release()
+
 
 async def generate_and_store_daily_text():
-    async with AsyncSessionLocal() as db:
-        res = await db.execute(select(Preference))
-        for pref in res.scalars().all():
-            try:
-                await generate_and_save_for_user(db, pref.user_id)
-            except Exception:
-                pass
+    if settings.motivation_batch_api:
+        await submit_daily_batch()
+        return
+
+    # The work is OpenAI round-trips, so users are generated concurrently,
+    # bounded to stay inside the account's rate limits. User ids are read a
+    # page at a time and a task is only created once a slot is free, so
+    # neither the id list nor one coroutine per user is held in memory.
+    sem = asyncio.Semaphore(settings.motivation_max_concurrency)
+    # results are written in bulk rather than one DELETE + INSERT per user
+    pending = _PendingMotivations(date.today())
+    group_size = settings.motivation_group_size
+    groups: dict[str, list[int]] = defaultdict(list)  # language -> user ids
+
+    async def dispatch(coro) -> None:
+        await sem.acquire()
+        tg.create_task(_release_after(sem, coro))
+
+    async with asyncio.TaskGroup() as tg:
+        async for page in _preference_pages(
+            select(Preference.user_id, Preference.language)
+        ):
+            for user_id, language in page:
+                if group_size < _MIN_GROUP_SIZE:
+                    await dispatch(_generate_for_user(pending, user_id))
+                    continue
+                # users sharing a language are generated together
+                group = groups[language]
+                group.append(user_id)
+                if len(group) == group_size:
+                    del groups[language]
+                    await dispatch(_generate_for_group(pending, group))
+
+        for group in groups.values():
+            if len(group) >= _MIN_GROUP_SIZE:
+                await dispatch(_generate_for_group(pending, group))
+            else:
+                for user_id in group:
+                    await dispatch(_generate_for_user(pending, user_id))
+    await pending.flush()
+
+
+async def submit_daily_batch() -> None:
+    """
+    Submit today's motivation requests for every user as OpenAI Batch API
+    jobs, split to stay under the per-file limits; collect_daily_batches
+    stores the results once they complete.
+    """
+    today = date.today().isoformat()
+    # every batch of this run carries it, so results of an older run that
+    # finishes late don't overwrite this one's (see collect_daily_batches)
+    run = str(int(time.time()))
+    lines: list[bytes] = []
+    size = 0
+    # one query (plus one for goals) per page instead of one per user
+    async for page in _preference_pages(
+        select(Preference.user_id, Preference).options(
+            selectinload(Preference.goals)
+        )
+    ):
+        for _, pref in page:
+            line = orjson.dumps(
+                {
+                    # the day is carried along: the batch may finish tomorrow
+                    "custom_id": f"{pref.user_id}:{today}",
+                    "method": "POST",
+                    "url": "/v1/chat/completions",
+                    "body": completion_params(motivation_messages(pref)),
+                }
+            )
+            if lines and (
+                len(lines) == _BATCH_MAX_REQUESTS
+                or size + len(line) + 1 > _BATCH_MAX_BYTES
+            ):
+                await _submit_batch(lines, today, run)
+                lines, size = [], 0
+            lines.append(line)
+            size += len(line) + 1
+    if lines:
+        await _submit_batch(lines, today, run)
+
+
+async def _submit_batch(lines: list[bytes], today: str, run: str) -> None:
+    batch_file = await client.files.create(
+        file=("motivations.jsonl", b"\n".join(lines)), purpose="batch"
+    )
+    batch = await client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+        metadata={"job": "daily_motivation", "date": today, "run": run},
+    )
+    # The Redis set is the only record of the (already billed) batch, so the
+    # id is logged first and the write retried rather than silently dropped
+    logger.info("Submitted motivation batch %s for %s users", batch.id, len(lines))
+    try:
+        await _remember_batch(batch.id)
+    except RedisError:
+        logger.error(
+            "Could not record motivation batch %s; its results won't be collected "
+            "until it is added with SADD %s %s",
+            batch.id,
+            PENDING_BATCHES_KEY,
+            batch.id,
+            exc_info=True,
+        )
+
+
+@retry(
+    wait=wait_exponential(min=1, max=10),
+    stop=stop_after_attempt(5),
+    retry=retry_if_exception_type(RedisError),
+    reraise=True,
+)
+async def _remember_batch(batch_id: str) -> None:
+    await redis.sadd(PENDING_BATCHES_KEY, batch_id)
+
+
+def _batch_result(line: bytes) -> tuple[int, date, dict] | None:
+    item = orjson.loads(line)
+    user_id, day = item["custom_id"].split(":")
+    response = item.get("response") or {}
+    if response.get("status_code") != 200:
+        logger.warning(
+            "Batch request %s failed: %s", item["custom_id"], item.get("error")
+        )
+        return None
+    content = response["body"]["choices"][0]["message"]["content"]
+    try:
+        mot = parse_motivation_reply(content)
+    except Exception:
+        logger.exception("Invalid batch result %s", item["custom_id"])
+        return None
+    return int(user_id), date.fromisoformat(day), mot.model_dump()
+
+
+async def collect_daily_batches() -> None:
+    """Store the results of finished motivation batches and forget them."""
+    for raw_id in await redis.smembers(PENDING_BATCHES_KEY):
+        batch_id = raw_id.decode()
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status in _BATCH_RUNNING:
+            continue
+
+        if batch.status == "completed" and batch.output_file_id:
+            # batches submitted before this change carry no run
+            run = int((batch.metadata or {}).get("run", batch.created_at))
+            output = await client.files.content(batch.output_file_id)
+            # None for the days a newer run has already stored
+            by_day: dict[date, _PendingMotivations | None] = {}
+            for line in output.content.splitlines():
+                if not line.strip() or (result := _batch_result(line)) is None:
+                    continue
+                user_id, day, payload = result
+                if day not in by_day:
+                    by_day[day] = (
+                        _PendingMotivations(day)
+                        if await _is_latest_run(day, run, batch_id)
+                        else None
+                    )
+                if (pending := by_day[day]) is not None:
+                    await pending.add({user_id: payload})
+            for day, pending in by_day.items():
+                if pending is not None:
+                    await pending.flush()
+                    await redis.set(
+                        _LATEST_RUN_KEY.format(day=day.isoformat()),
+                        run,
+                        ex=_LATEST_RUN_TTL,
+                    )
+            logger.info("Collected motivation batch %s", batch_id)
+        else:
+            logger.warning("Motivation batch %s ended as %s", batch_id, batch.status)
+        await redis.srem(PENDING_BATCHES_KEY, batch_id)
+
+
+
+async def _is_latest_run(day: date, run: int, batch_id: str) -> bool:
+    # The job runs several times a day, so an older run can finish after a
+    # newer one; its results must not replace the newer motivations
+    latest = await redis.get(_LATEST_RUN_KEY.format(day=day.isoformat()))
+    if latest is not None and int(latest) > run:
+        logger.info(
+            "Skipping motivations for %s from superseded batch %s", day, batch_id
+        )
+        return False
+    return True
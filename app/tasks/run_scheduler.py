@@ -5,11 +5,13 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 
 from app.core.config import settings
+from app.core.logging_config import setup_queue_logging
+from app.services.motivation_service import MOTIVATION_MODEL
+from app.services.openai_limiter import load_encoding
 from app.tasks.badge_job import assign_due_badges
-from app.tasks.motivation_job import generate_and_store_daily_text
+from app.tasks.motivation_job import collect_daily_batches, generate_and_store_daily_text
 
 log = logging.getLogger("scheduler")
-logging.basicConfig(level=logging.INFO)
 
 
 def make_scheduler() -> AsyncIOScheduler:
@@ -25,7 +27,7 @@ def make_scheduler() -> AsyncIOScheduler:
 
     s.add_job(
         generate_and_store_daily_text,
-        trigger=IntervalTrigger(hours=8),
+        trigger=IntervalTrigger(hours=settings.motivation_interval_hours),
         id="motivation_interval_job",
         replace_existing=True,
         max_instances=1,
@@ -33,9 +35,19 @@ def make_scheduler() -> AsyncIOScheduler:
         misfire_grace_time=300,
         jitter=60,
     )
+    if settings.motivation_batch_api:
+        s.add_job(
+            collect_daily_batches,
+            trigger=IntervalTrigger(minutes=settings.motivation_batch_poll_minutes),
+            id="motivation_batch_collect_job",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=300,
+        )
     s.add_job(
         assign_due_badges,
-        trigger=IntervalTrigger(hours=24),
+        trigger=IntervalTrigger(minutes=settings.badge_interval_minutes),
         id="badge_assign_job",
         replace_existing=True,
         max_instances=1,
@@ -47,12 +59,16 @@ def make_scheduler() -> AsyncIOScheduler:
 
 
 async def main():
+    log_listener = setup_queue_logging()
+    # Fetch the token-count encoding before the first motivation job runs
+    await load_encoding(MOTIVATION_MODEL)
     scheduler = make_scheduler()
     scheduler.start()
     try:
         await asyncio.Event().wait()
     finally:
         scheduler.shutdown(wait=False)
+        log_listener.stop()
 
 
 if __name__ == "__main__":
@@ -1,12 +1,12 @@
-import json
-from typing import Any, Generator, Iterable, Optional
+from typing import Any, AsyncIterator, Iterable, Optional
 
+import orjson
 from fastapi.responses import StreamingResponse
 
 
-def sse(gen: Generator[str, None, None]) -> StreamingResponse:
-    def wrap():
-        for chunk in gen:
+def sse(gen: AsyncIterator[str]) -> StreamingResponse:
+    async def wrap():
+        async for chunk in gen:
             yield f"data: {chunk}\n\n"
         yield "event: end\ndata: [DONE]\n\n"
 
@@ -15,7 +15,9 @@ def sse(gen: Generator[str, None, None]) -> StreamingResponse:
 
 def _to_json(obj: Any) -> str:
     """Safe JSON dump with unicode preserved."""
-    return json.dumps(obj, ensure_ascii=False, default=str)
+    # orjson emits UTF-8 as-is (like ensure_ascii=False); non-str keys are
+    # stringified as json.dumps would
+    return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode()
 
 
 def _event(name: str, **data: Any) -> str:
@@ -34,13 +36,14 @@ def _iter_tool_calls(msg: Any) -> Iterable[tuple[Optional[str], dict]]:
     Yield (name, args) pairs for tool calls.
     Handles dict-like and object-like tool call shapes.
     """
-    tool_calls = getattr(msg, "tool_calls", None) or []
-    for tc in tool_calls:
-        if isinstance(tc, dict):
-            name = tc.get("name")
-            args = tc.get("args") or {}
-        else:
-            name = getattr(tc, "name", None)
-            args = getattr(tc, "args", None) or {}
-        yield name, args
+    tool_calls = getattr(msg, "tool_calls", None)
+    if not tool_calls:
+        return
+    # a message's tool calls all share one shape, so check it once
+    if isinstance(tool_calls[0], dict):
+        for tc in tool_calls:
+            yield tc.get("name"), tc.get("args") or {}
+    else:
+        for tc in tool_calls:
+            yield getattr(tc, "name", None), getattr(tc, "args", None) or {}
 